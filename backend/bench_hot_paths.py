@@ -0,0 +1,175 @@
+"""
+Micro-benchmarks for the analysis hot paths.
+Each function is timed call by call over a bundled synthetic corpus of
+short, medium and long Indonesian and English reviews
+(bench_data/corpus.tsv); ops/sec and p50/p99 latency are reported per
+function and review size.
+
+Save a baseline, then compare later runs against it:
+    python bench_hot_paths.py --save bench_baseline.json
+    python bench_hot_paths.py --compare bench_baseline.json --threshold 0.2
+The comparison exits with status 1 when any benchmark is slower than the
+baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import time
+from datetime import datetime, timezone
+
+import language_detector
+import sentiment_analyzer
+from key_points_extractor import _post_process_indonesian, _simple_key_points_extraction
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(BASE_DIR, "bench_data", "corpus.tsv")
+SIZES = ("short", "medium", "long")
+# Jumlah kalimat per ulasan untuk tiap ukuran
+SENTENCES_PER_SIZE = {"short": 1, "medium": 4, "long": 40}
+REVIEWS_PER_GROUP = 20
+
+def generate_corpus(path: str = CORPUS_PATH, seed: int = 20240115):
+    """Build the corpus from the language_data sentences (deterministic for a given seed)"""
+    rng = random.Random(seed)
+    rows = []
+    for language, source in (("id", "id.txt"), ("en", "en.txt")):
+        with open(os.path.join(BASE_DIR, "language_data", source), encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+        for size in SIZES:
+            for _ in range(REVIEWS_PER_GROUP):
+                picked = rng.choices(sentences, k=SENTENCES_PER_SIZE[size])
+                rows.append((language, size, ". ".join(picked) + "."))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write("\t".join(row) + "\n")
+    print(f"✓ Wrote {len(rows)} reviews to {path}")
+
+def load_corpus(path: str = CORPUS_PATH):
+    """{(language, size): [texts]}"""
+    corpus = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                language, size, text = line.rstrip("\n").split("\t", 2)
+                corpus.setdefault((language, size), []).append(text)
+    return corpus
+
+def _as_bullets(text: str) -> str:
+    # Masukan _post_process_indonesian adalah daftar poin dari LLM
+    return "\n".join(f"• {sentence.strip()}" for sentence in text.split(".") if sentence.strip())
+
+# Fungsi yang diukur: nama -> (bahasa yang dipakai, persiapan masukan, fungsi)
+detect_uncached = language_detector.detect_language_with_confidence.__wrapped__
+BENCHMARKS = {
+    "detect_language": (("id", "en"), None, lambda text, language: detect_uncached(text)),
+    "analyze_sentiment_indonesian": (("id",), None,
+                                     lambda text, language: sentiment_analyzer._analyze_sentiment_indonesian(text)),
+    "post_process_indonesian": (("id",), _as_bullets, lambda text, language: _post_process_indonesian(text)),
+    "simple_key_points_extraction": (("id", "en"), None, _simple_key_points_extraction),
+    "sentiment_pipeline": (("id", "en"), None, lambda text, language: sentiment_analyzer._predict_texts([text])),
+}
+
+def _percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def time_calls(func, inputs, min_time: float, min_calls: int, warmup: int = 5) -> dict:
+    """Call func over the inputs (cycling) until both min_time and min_calls are reached"""
+    for language, text in inputs[:warmup]:
+        func(text, language)
+    durations = []
+    total = 0.0
+    index = 0
+    while total < min_time or len(durations) < min_calls:
+        language, text = inputs[index % len(inputs)]
+        start = time.perf_counter()
+        func(text, language)
+        elapsed = time.perf_counter() - start
+        durations.append(elapsed)
+        total += elapsed
+        index += 1
+    durations.sort()
+    return {
+        "calls": len(durations),
+        "ops_per_sec": round(len(durations) / total, 1),
+        "p50_us": round(_percentile(durations, 0.50) * 1e6, 1),
+        "p99_us": round(_percentile(durations, 0.99) * 1e6, 1),
+    }
+
+def run_benchmarks(corpus, selected=None, min_time: float = 0.5, min_calls: int = 50) -> dict:
+    results = {}
+    for name, (languages, prepare, func) in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        if name == "sentiment_pipeline":
+            try:
+                sentiment_analyzer.get_sentiment_analyzer()
+            except Exception as e:
+                print(f"⚠ Skipping {name}: model unavailable ({e})")
+                continue
+        for size in SIZES:
+            inputs = [
+                (language, prepare(text) if prepare else text)
+                for language in languages
+                for text in corpus.get((language, size), [])
+            ]
+            if not inputs:
+                continue
+            key = f"{name}/{size}"
+            results[key] = time_calls(func, inputs, min_time, min_calls)
+            stats = results[key]
+            print(f"{key:<42}{stats['ops_per_sec']:>12.1f} ops/s"
+                  f"{stats['p50_us']:>12.1f} us p50{stats['p99_us']:>12.1f} us p99", flush=True)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print the change per benchmark; return False when any regression exceeds the threshold"""
+    ok = True
+    print(f"\n{'benchmark':<42}{'baseline':>12}{'current':>12}{'change':>10}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:<42}{'-':>12}{current['ops_per_sec']:>12.1f}{'new':>10}")
+            continue
+        change = current["ops_per_sec"] / previous["ops_per_sec"] - 1
+        regressed = change < -threshold
+        ok = ok and not regressed
+        marker = "  ✗ REGRESSION" if regressed else ""
+        print(f"{key:<42}{previous['ops_per_sec']:>12.1f}{current['ops_per_sec']:>12.1f}{change:>+10.1%}{marker}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="TSV file of language<TAB>size<TAB>text")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum measured seconds per benchmark")
+    parser.add_argument("--min-calls", type=int, default=50, help="Minimum calls per benchmark")
+    parser.add_argument("--save", help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare against this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed ops/sec drop before a benchmark counts as regressed (0.2 = 20%%)")
+    parser.add_argument("--regenerate-corpus", action="store_true", help="Rebuild the corpus from language_data")
+    args = parser.parse_args()
+
+    if args.regenerate_corpus:
+        generate_corpus(args.corpus)
+    results = run_benchmarks(load_corpus(args.corpus), args.only, args.min_time, args.min_calls)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "sentiment_backend": sentiment_analyzer.SENTIMENT_BACKEND,
+                "results": results,
+            }, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if not compare(results, baseline, args.threshold):
+            raise SystemExit(1)
@@ -0,0 +1,127 @@
+"""
+Benchmark of the ways reviews are written to the database, in rows/sec:
+    orm_per_row_refresh  add + commit + refresh per review (previous /api/analyze-review path)
+    orm_per_row          add + flush (INSERT ... RETURNING) + commit per review
+    orm_batch            /api/analyze-reviews path, one transaction per MAX_BATCH_REVIEWS rows
+    multi_row_insert     bulk_ingest with multi-row INSERT ... VALUES
+    copy                 bulk_ingest with COPY (PostgreSQL + psycopg2 only)
+Runs against DATABASE_URL. Every benchmarked text starts with a marker
+unique to the run, and afterwards only rows carrying that marker (and their
+statistics counters) are deleted; rows written by real clients meanwhile
+are left alone.
+
+Run:   python bench_inserts.py [--rows 2000] [--only copy multi_row_insert]
+"""
+import argparse
+import os
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from database import Base, SessionLocal, engine, upgrade_schema
+from models import Review
+from review_stats import apply_deltas, hour_bucket
+import bulk_ingest
+from main import _save_review, _save_reviews, MAX_BATCH_REVIEWS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SENTIMENTS = ("positive", "negative", "neutral")
+
+reviews = Review.__table__
+
+def load_texts(count: int, marker: str = ""):
+    """`count` review texts prefixed with `marker`, cycling through the language_data sentences"""
+    texts = []
+    for name in ("id.txt", "en.txt"):
+        with open(os.path.join(BASE_DIR, "language_data", name), encoding="utf-8") as f:
+            texts.extend(line.strip() for line in f if line.strip())
+    return [marker + texts[i % len(texts)] for i in range(count)]
+
+def _orm_per_row_refresh(texts, sentiments):
+    for text, sentiment in zip(texts, sentiments):
+        with SessionLocal() as db:
+            db_review = Review(review_text=text, sentiment=sentiment, key_points=None)
+            db.add(db_review)
+            db.commit()
+            # SELECT kedua hanya untuk membaca id dan created_at
+            db.refresh(db_review)
+
+def _orm_per_row(texts, sentiments):
+    for text, sentiment in zip(texts, sentiments):
+        with SessionLocal() as db:
+            _save_review(db, text, sentiment, None)
+
+def _orm_batch(texts, sentiments):
+    for start in range(0, len(texts), MAX_BATCH_REVIEWS):
+        with SessionLocal() as db:
+            end = start + MAX_BATCH_REVIEWS
+            _save_reviews(db, texts[start:end], sentiments[start:end], [None] * len(texts[start:end]))
+
+def _bulk(method):
+    def run(texts, sentiments):
+        with engine.begin() as conn:
+            bulk_ingest.insert_reviews(conn, texts, sentiments, method=method)
+    return run
+
+BENCHMARKS = {
+    "orm_per_row_refresh": _orm_per_row_refresh,
+    "orm_per_row": _orm_per_row,
+    "orm_batch": _orm_batch,
+    "multi_row_insert": _bulk("insert"),
+    "copy": _bulk("copy"),
+}
+
+def _delete_benchmark_rows(last_id: int, marker: str):
+    """Remove the rows this run inserted (id > last_id and text starting with marker) and their statistics"""
+    # Marker hanya berisi huruf, angka, '-' dan ':', jadi aman dipakai langsung dalam LIKE
+    benchmark_rows = (reviews.c.id > last_id) & reviews.c.review_text.like(marker + "%")
+    with engine.begin() as conn:
+        deltas = Counter()
+        for created_at, sentiment in conn.execute(
+            select(reviews.c.created_at, reviews.c.sentiment).where(benchmark_rows)
+        ):
+            deltas[(hour_bucket(created_at), sentiment)] -= 1
+        conn.execute(reviews.delete().where(benchmark_rows))
+        apply_deltas(conn, deltas)
+
+def run_benchmarks(rows: int, selected=None) -> dict:
+    marker = f"bench-inserts-{uuid.uuid4().hex}: "
+    texts = load_texts(rows, marker)
+    sentiments = [SENTIMENTS[i % len(SENTIMENTS)] for i in range(rows)]
+    results = {}
+    with engine.connect() as conn:
+        can_copy = bulk_ingest.resolve_method(conn) == "copy"
+    for name, write in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        if name == "copy" and not can_copy:
+            print(f"⚠ Skipping {name}: needs PostgreSQL with psycopg2")
+            continue
+        with engine.connect() as conn:
+            last_id = conn.execute(select(func.coalesce(func.max(reviews.c.id), 0))).scalar()
+        start = time.perf_counter()
+        try:
+            write(texts, sentiments)
+            elapsed = time.perf_counter() - start
+        finally:
+            _delete_benchmark_rows(last_id, marker)
+        results[name] = {"rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1)}
+        print(f"{name:<24}{rows:>8} rows{elapsed:>10.2f} s{rows / elapsed:>14.1f} rows/s", flush=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark review insert paths (rows/sec)")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows written per benchmark")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    results = run_benchmarks(max(1, args.rows), args.only)
+    baseline = results.get("orm_per_row_refresh")
+    if baseline:
+        print()
+        for name, stats in results.items():
+            print(f"{name:<24}{stats['rows_per_sec'] / baseline['rows_per_sec']:>8.1f}x orm_per_row_refresh")
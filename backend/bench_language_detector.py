@@ -0,0 +1,68 @@
+"""
+Compare the n-gram language identifier with the legacy indicator detector.
+Reports routing accuracy on language_data/eval.tsv (reviews not used for
+training) and the average time per call without memoisation.
+"""
+import argparse
+import os
+import time
+
+import language_detector
+from language_detector import LanguageModel, detect_language_legacy, LANGUAGE_MODEL_PATH
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_data", "eval.tsv")
+
+def read_eval(path: str):
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                language, text = line.rstrip("\n").split("\t", 1)
+                samples.append((language, text))
+    return samples
+
+def evaluate(name: str, detect, samples, repeat: int):
+    wrong = {"id": 0, "en": 0}
+    for language, text in samples:
+        if detect(text) != language:
+            wrong[language] += 1
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, text in samples:
+            detect(text)
+    per_call_us = (time.perf_counter() - start) / (repeat * len(samples)) * 1e6
+
+    totals = {lang: sum(1 for l, _ in samples if l == lang) for lang in ("id", "en")}
+    accuracy = 1 - (wrong["id"] + wrong["en"]) / len(samples)
+    print(f"{name}")
+    print(f"  accuracy:            {accuracy:.1%}")
+    print(f"  English sent to id:  {wrong['en']}/{totals['en']}")
+    print(f"  Indonesian sent to en: {wrong['id']}/{totals['id']}")
+    print(f"  time per call:       {per_call_us:.1f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark language detectors")
+    parser.add_argument("--eval", default=EVAL_PATH, help="TSV file of language<TAB>text")
+    parser.add_argument("--model", default=LANGUAGE_MODEL_PATH, help="Trained model file")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions over the eval set")
+    args = parser.parse_args()
+
+    samples = read_eval(args.eval)
+    model = LanguageModel.load(args.model)
+    print(f"{len(samples)} labelled reviews\n")
+    evaluate("legacy (indicators)", detect_language_legacy, samples, args.repeat)
+    evaluate("ngram model", lambda text: model.classify(text.lower())[0], samples, args.repeat)
+    # Jalur produksi: model + bahasa default saat kepercayaan rendah (tanpa memo)
+    detect_uncached = language_detector.detect_language_with_confidence.__wrapped__
+    evaluate(f"ngram + default '{language_detector.LANGUAGE_DEFAULT}'", lambda text: detect_uncached(text)[0],
+             samples, args.repeat)
+
+    # Teks yang kepercayaannya di bawah LANGUAGE_MIN_CONFIDENCE, dibandingkan per strategi
+    uncertain = [(language, text) for language, text in samples
+                 if model.classify(text.lower())[1] < language_detector.LANGUAGE_MIN_CONFIDENCE]
+    if uncertain:
+        print(f"\n{len(uncertain)} review(s) below confidence {language_detector.LANGUAGE_MIN_CONFIDENCE}")
+        evaluate("legacy (indicators)", detect_language_legacy, uncertain, args.repeat)
+        evaluate("ngram argmax", lambda text: model.classify(text.lower())[0], uncertain, args.repeat)
+        evaluate(f"default '{language_detector.LANGUAGE_DEFAULT}'", lambda text: detect_uncached(text)[0],
+                 uncertain, args.repeat)
@@ -0,0 +1,131 @@
+"""
+Bulk ingestion of analysed reviews.
+insert_reviews() writes many rows per statement: PostgreSQL COPY when the
+connection uses psycopg2, otherwise multi-row INSERT ... VALUES. Rows are
+written in the caller's transaction together with the matching sentiment
+statistics deltas (core statements bypass the ORM session events).
+
+Run:   python bulk_ingest.py reviews.txt [--key-points] [--method copy|insert]
+(one review per line)
+"""
+import argparse
+import io
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from sqlalchemy import insert
+
+load_dotenv()
+
+from database import engine, upgrade_schema
+from models import Review
+from review_stats import apply_deltas, hour_bucket
+from sentiment_analyzer import ANALYZER_VERSION
+
+# Baris per perintah COPY / INSERT multi-baris
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "5000"))
+# Baris per INSERT multi-baris dibatasi jumlah parameter per statement (SQLite: 32766)
+MAX_INSERT_ROWS = 1000
+METHODS = ("auto", "copy", "insert")
+
+reviews = Review.__table__
+COLUMNS = ("review_text", "sentiment", "key_points", "analysis_version", "created_at")
+
+def _copy_value(value) -> str:
+    # Format teks COPY: NULL = \N; backslash, tab dan baris baru di-escape
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def _copy_rows(connection, rows):
+    """COPY rows into reviews through the psycopg2 connection of this transaction"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {reviews.name} ({', '.join(COLUMNS)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+def _insert_rows(connection, rows):
+    """Multi-row INSERT ... VALUES, one statement per MAX_INSERT_ROWS rows"""
+    for start in range(0, len(rows), MAX_INSERT_ROWS):
+        connection.execute(insert(reviews).values(rows[start:start + MAX_INSERT_ROWS]))
+
+def resolve_method(connection, method: str = "auto") -> str:
+    """'copy' on PostgreSQL with psycopg2, 'insert' elsewhere"""
+    supports_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+    if method == "auto":
+        return "copy" if supports_copy else "insert"
+    if method == "copy" and not supports_copy:
+        raise ValueError(f"COPY needs PostgreSQL with psycopg2, not {connection.dialect.name}+{connection.dialect.driver}")
+    return method
+
+def insert_reviews(connection, review_texts, sentiments, key_points=None, method: str = "auto",
+                   chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> int:
+    """
+    Insert analysed reviews in the caller's transaction and return the row count.
+    Ids are not returned; use the ORM path when the inserted rows are needed back.
+    """
+    method = resolve_method(connection, method)
+    key_points = key_points if key_points is not None else [None] * len(review_texts)
+    # created_at diisi di sini (bukan default server) agar bucket statistik sama persis dengan barisnya
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {"review_text": text, "sentiment": sentiment, "key_points": points,
+         "analysis_version": ANALYZER_VERSION, "created_at": created_at}
+        for text, sentiment, points in zip(review_texts, sentiments, key_points)
+    ]
+    write = _copy_rows if method == "copy" else _insert_rows
+    for start in range(0, len(rows), max(1, chunk_size)):
+        write(connection, rows[start:start + chunk_size])
+    apply_deltas(connection, Counter({
+        (hour_bucket(created_at), sentiment): count for sentiment, count in Counter(sentiments).items()
+    }))
+    return len(rows)
+
+def ingest_file(path: str, with_key_points: bool = False, method: str = "auto",
+                chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> int:
+    """Analyse the reviews in a text file (one per line) and bulk insert them, one transaction per chunk"""
+    from sentiment_analyzer import analyze_sentiment_batch
+    upgrade_schema(engine)
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    print(f"{len(texts)} review(s) to ingest from {path}")
+
+    inserted = 0
+    analysis_time = 0.0
+    write_time = 0.0
+    for start in range(0, len(texts), max(1, chunk_size)):
+        chunk = texts[start:start + chunk_size]
+        analysis_start = time.perf_counter()
+        sentiments = analyze_sentiment_batch(chunk)
+        points = None
+        if with_key_points:
+            from key_points_extractor import extract_key_points_batch
+            points = extract_key_points_batch(chunk)
+        write_start = time.perf_counter()
+        analysis_time += write_start - analysis_start
+        with engine.begin() as conn:
+            inserted += insert_reviews(conn, chunk, sentiments, points, method, chunk_size)
+        write_time += time.perf_counter() - write_start
+        print(f"  {inserted}/{len(texts)} inserted ({inserted / write_time:.0f} rows/s written)", flush=True)
+    print(f"✓ Ingested {inserted} review(s): analysis {analysis_time:.1f}s, database {write_time:.1f}s")
+    return inserted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse reviews from a file and bulk insert them")
+    parser.add_argument("path", help="Text file with one review per line")
+    parser.add_argument("--key-points", action="store_true", help="Also extract key points (calls Gemini/Groq)")
+    parser.add_argument("--method", choices=METHODS, default="auto", help="COPY (PostgreSQL) or multi-row INSERT")
+    parser.add_argument("--chunk-size", type=int, default=BULK_INSERT_CHUNK_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+    ingest_file(args.path, args.key_points, args.method, max(1, args.chunk_size))
@@ -0,0 +1,178 @@
+"""
+Vectorised rule-based sentiment for many Indonesian reviews at once.
+Each review becomes one row of a sparse feature matrix (which lexicon
+phrases occur in it, and which positive/negation patterns match); one
+matrix product with a fixed weight matrix then yields every lexicon count
+for every review, and the verdict rules of _score_sentiment_indonesian
+are applied to whole columns with NumPy.
+Labels are identical to _analyze_sentiment_indonesian (see test_bulk_scorer.py).
+analyze_sentiment_batch() (reanalyze.py, bulk_ingest.py) scores its
+Indonesian reviews here; the ML model only sees the undecided ones.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    # Tanpa SciPy, matriks fitur dibuat padat (lebih boros memori, hasil sama)
+    sparse = None
+
+import sentiment_lexicon
+
+_MATCHER = sentiment_lexicon._MATCHER
+_PHRASES = len(_MATCHER.phrases)
+
+# Kolom fitur: [frasa di mana saja | frasa dengan batas kata | pola positif | pola negasi]
+_BOUNDED_OFFSET = _PHRASES
+_PATTERN_OFFSET = 2 * _PHRASES
+_NEGATION_OFFSET = _PATTERN_OFFSET + len(sentiment_lexicon._POSITIVE_PATTERNS)
+FEATURE_COUNT = _NEGATION_OFFSET + len(sentiment_lexicon._NEGATION_PATTERNS)
+
+# Kolom hasil perkalian, sama dengan field LexiconCounts
+COUNT_COLUMNS = sentiment_lexicon.LexiconCounts._fields
+(_STRONG_POS, _MODERATE_POS, _STRONG_NEG, _MODERATE_NEG, _PATTERN_POS,
+ _POSITIVE_WORDS, _POSSESSIVE, _NEGATION_NEG, _NEGATION_POS) = range(len(COUNT_COLUMNS))
+
+def _build_weights() -> np.ndarray:
+    weights = np.zeros((FEATURE_COUNT, len(COUNT_COLUMNS)), dtype=np.int32)
+    for column, entries in (
+        (_STRONG_POS, sentiment_lexicon._STRONG_POSITIVE),
+        (_MODERATE_POS, sentiment_lexicon._MODERATE_POSITIVE),
+        (_STRONG_NEG, sentiment_lexicon._STRONG_NEGATIVE),
+        (_MODERATE_NEG, sentiment_lexicon._MODERATE_NEGATIVE),
+    ):
+        for phrase_id, weight, substring in entries:
+            weights[phrase_id if substring else _BOUNDED_OFFSET + phrase_id, column] += weight
+    for phrase_id in sentiment_lexicon._INDIVIDUAL_POSITIVE_WORDS:
+        weights[_BOUNDED_OFFSET + phrase_id, _POSITIVE_WORDS] += 1
+    for phrase_id in sentiment_lexicon._POSSESSIVE_WORDS:
+        weights[_BOUNDED_OFFSET + phrase_id, _POSSESSIVE] += 1
+    weights[_PATTERN_OFFSET:_NEGATION_OFFSET, _PATTERN_POS] = 1
+    for index, (_, negative, positive) in enumerate(sentiment_lexicon._NEGATION_PATTERNS):
+        weights[_NEGATION_OFFSET + index, _NEGATION_NEG] = negative
+        weights[_NEGATION_OFFSET + index, _NEGATION_POS] = positive
+    return weights
+
+WEIGHTS = _build_weights()
+
+_POSITIVE_PATTERN_TRIGGERS = frozenset(sentiment_lexicon._POSITIVE_PATTERN_TRIGGERS)
+_NEGATION_TRIGGERS = frozenset(sentiment_lexicon._NEGATION_TRIGGERS)
+
+def _pattern_features(text_lower: str, anywhere: set) -> List[int]:
+    """Positive and negation pattern columns of one review, relative to _PATTERN_OFFSET"""
+    columns = []
+    # Pola regex hanya dijalankan jika kata pemicunya ada, sama seperti count_indicators
+    if not _POSITIVE_PATTERN_TRIGGERS.isdisjoint(anywhere):
+        columns.extend(index for index, pattern in enumerate(sentiment_lexicon._POSITIVE_PATTERNS)
+                       if pattern.search(text_lower))
+    if not _NEGATION_TRIGGERS.isdisjoint(anywhere):
+        negation_offset = _NEGATION_OFFSET - _PATTERN_OFFSET
+        columns.extend(negation_offset + index
+                       for index, (pattern, _, _) in enumerate(sentiment_lexicon._NEGATION_PATTERNS)
+                       if pattern.search(text_lower))
+    return columns
+
+def _block_rows(indptr: List[int]) -> np.ndarray:
+    # Nomor baris untuk setiap entri satu blok (format CSR -> COO)
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+def feature_matrix(texts: Sequence[str]) -> Tuple[object, np.ndarray]:
+    """
+    Binary (reviews x FEATURE_COUNT) matrix, CSR when SciPy is available,
+    plus the word count of every review.
+    The phrase id sets returned by the lexicon matcher are appended as they
+    are (no per-phrase Python work); the column offsets of each block are
+    added afterwards with NumPy.
+    """
+    find = _MATCHER.find
+    blocks = ([], [], [])  # frasa di mana saja, frasa dengan batas kata, pola
+    pointers = ([0], [0], [0])
+    word_counts = np.empty(len(texts), dtype=np.int32)
+    for row, text in enumerate(texts):
+        text_lower = text.lower()
+        word_counts[row] = len(text_lower.split())
+        anywhere, bounded = find(text_lower)
+        blocks[0].extend(anywhere)
+        blocks[1].extend(bounded)
+        blocks[2].extend(_pattern_features(text_lower, anywhere))
+        for block, indptr in zip(blocks, pointers):
+            indptr.append(len(block))
+
+    rows = np.concatenate([_block_rows(indptr) for indptr in pointers])
+    columns = np.concatenate([
+        np.asarray(block, dtype=np.int32) + offset
+        for block, offset in zip(blocks, (0, _BOUNDED_OFFSET, _PATTERN_OFFSET))
+    ])
+    if sparse is not None:
+        data = np.ones(len(columns), dtype=np.int32)
+        return sparse.csr_matrix((data, (rows, columns)), shape=(len(texts), FEATURE_COUNT)), word_counts
+    dense = np.zeros((len(texts), FEATURE_COUNT), dtype=np.int32)
+    dense[rows, columns] = 1
+    return dense, word_counts
+
+def lexicon_counts(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(reviews x len(COUNT_COLUMNS)) lexicon counts from one matrix product, plus word counts"""
+    features, word_counts = feature_matrix(texts)
+    counts = features @ WEIGHTS
+    return np.asarray(counts, dtype=np.int32), word_counts
+
+def score_sentiment_indonesian_bulk(texts: Sequence[str]) -> Tuple[List[Optional[str]], np.ndarray]:
+    """
+    Rule-based verdict and margin per review, like _score_sentiment_indonesian.
+    The rules below are the same priorities, applied to all reviews at once.
+    """
+    if not texts:
+        return [], np.zeros(0, dtype=np.int32)
+    counts, word_counts = lexicon_counts(texts)
+    strong_pos = counts[:, _STRONG_POS]
+    moderate_pos = counts[:, _MODERATE_POS]
+    strong_neg = counts[:, _STRONG_NEG]
+    moderate_neg = counts[:, _MODERATE_NEG]
+    positive_words = counts[:, _POSITIVE_WORDS]
+    has_possessive = counts[:, _POSSESSIVE] > 0
+    short = word_counts <= 15
+
+    # Bonus kepemilikan + kata positif, lalu bonus banyak kata positif / ulasan pendek
+    pattern_pos = counts[:, _PATTERN_POS] + 2 * (has_possessive & (positive_words >= 1))
+    pattern_pos = pattern_pos + np.where(
+        positive_words >= 2, 2,
+        ((positive_words >= 1) & short & (pattern_pos > 0)).astype(np.int32)
+    )
+
+    positive_score = strong_pos * 3 + moderate_pos + pattern_pos * 3 + counts[:, _NEGATION_POS]
+    negative_score = strong_neg * 3 + moderate_neg + counts[:, _NEGATION_NEG]
+    margin = np.abs(positive_score - negative_score)
+    no_negative = negative_score == 0
+    positive_wins = positive_score > negative_score
+    negative_wins = negative_score > positive_score
+    fallback_positive = (strong_pos > 0) | (pattern_pos > 0) | (moderate_pos >= 2)
+    single_moderate = ~fallback_positive & (moderate_pos >= 1) & no_negative
+
+    # Urutan kondisi = urutan prioritas; kondisi pertama yang cocok menentukan label
+    rules = [
+        ((pattern_pos > 0) & (no_negative | (positive_score >= negative_score)), "positive"),
+        (pattern_pos >= 2, "positive"),
+        ((positive_words >= 2) & (no_negative | ((positive_score >= negative_score) & (strong_neg == 0))), "positive"),
+        (has_possessive & (positive_words >= 1) & no_negative, "positive"),
+        (positive_wins & (positive_score >= 1), "positive"),
+        (positive_wins & short & ((strong_pos > 0) | (moderate_pos > 0) | (pattern_pos > 0)), "positive"),
+        (negative_wins & (negative_score >= 1), "negative"),
+        (negative_wins & short & ((strong_neg > 0) | (moderate_neg > 0)), "negative"),
+        (fallback_positive, "positive"),
+        (single_moderate & short, "positive"),
+        # Satu kata positif tanpa negatif pada ulasan panjang: tidak ada putusan
+        (single_moderate, None),
+        ((strong_neg > 0) | (moderate_neg >= 2), "negative"),
+    ]
+    labels = np.select(
+        [condition for condition, _ in rules],
+        np.array([label for _, label in rules], dtype=object),
+        default="neutral"
+    )
+    return labels.tolist(), margin
+
+def analyze_sentiment_indonesian_bulk(texts: Sequence[str]) -> List[Optional[str]]:
+    """Labels of _analyze_sentiment_indonesian for many reviews"""
+    return score_sentiment_indonesian_bulk(texts)[0]
@@ -0,0 +1,28 @@
+"""
+Download the sentiment model into a pinned local directory.
+Point SENTIMENT_MODEL_PATH at the output directory to load the model at
+startup without any Hugging Face Hub lookup.
+"""
+import argparse
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from sentiment_analyzer import SENTIMENT_MODEL_NAME
+
+def download_model(output_dir: str, revision: str = "main"):
+    """Fetch tokenizer and weights at a fixed revision and save them locally"""
+    print(f"Downloading {SENTIMENT_MODEL_NAME} (revision: {revision})...")
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME, revision=revision)
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME, revision=revision)
+    tokenizer.save_pretrained(output_dir)
+    model.save_pretrained(output_dir)
+    print(f"✓ Model saved to {output_dir}")
+    print(f"  Add to .env: SENTIMENT_MODEL_PATH={output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the sentiment model to a local directory")
+    parser.add_argument("--output", default="model_cache/twitter-roberta-base-sentiment-latest",
+                        help="Target directory for the model files")
+    parser.add_argument("--revision", default="main",
+                        help="Hub branch, tag or commit hash to pin")
+    args = parser.parse_args()
+    download_model(args.output, args.revision)
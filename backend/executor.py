@@ -0,0 +1,61 @@
+"""
+Bounded thread pools for blocking work so it never runs on the event loop.
+Model inference and Gemini/Groq HTTP calls run on the analysis pool; sync
+SQLAlchemy session work runs on a separate database pool, so reads are not
+queued behind multi-second analyses when the analysis pool is full.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Jumlah thread untuk tahap CPU-bound dan I/O blocking per worker uvicorn
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "32"))
+# Jumlah thread untuk query database (sesi sync); terpisah dari tahap analisis
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
+
+POOL_ANALYSIS = "analysis"
+POOL_DB = "db"
+_POOL_SIZES = {POOL_ANALYSIS: ANALYSIS_WORKERS, POOL_DB: DB_EXECUTOR_WORKERS}
+
+_executors = {}
+
+def get_executor(pool: str = POOL_ANALYSIS) -> ThreadPoolExecutor:
+    """Return the executor for `pool`, creating it on first use"""
+    if pool not in _executors:
+        _executors[pool] = ThreadPoolExecutor(
+            max_workers=max(1, _POOL_SIZES[pool]),
+            thread_name_prefix=pool
+        )
+    return _executors[pool]
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable on the analysis executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(POOL_ANALYSIS), partial(func, *args, **kwargs))
+
+async def run_blocking_timed(func, *args, **kwargs):
+    """Like run_blocking, but also return the elapsed wall time in milliseconds"""
+    start = time.perf_counter()
+    result = await run_blocking(func, *args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+async def run_db(func, *args, **kwargs):
+    """Run blocking database work on the database executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(POOL_DB), partial(func, *args, **kwargs))
+
+async def run_db_timed(func, *args, **kwargs):
+    """Like run_db, but also return the elapsed wall time in milliseconds"""
+    start = time.perf_counter()
+    result = await run_db(func, *args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def shutdown_executor():
+    """Stop the executors, waiting for in-flight work to finish"""
+    for pool in list(_executors):
+        _executors.pop(pool).shutdown(wait=True)
@@ -0,0 +1,97 @@
+"""
+Export the sentiment model to ONNX and build a dynamically quantised int8 copy.
+Run once, then set SENTIMENT_BACKEND=onnx or onnx-int8 and point
+SENTIMENT_ONNX_PATH at the output directory. The export also checks that
+both ONNX variants give the same labels as the torch pipeline and prints
+their CPU throughput.
+"""
+import argparse
+import os
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+from sentiment_analyzer import SENTIMENT_MODEL_NAME, SENTIMENT_MODEL_PATH, SENTIMENT_ONNX_PATH
+from onnx_sentiment import OnnxSentimentPipeline, ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE
+
+SAMPLE_REVIEWS = [
+    "Produknya keren dan enak dimakan, pengiriman cepat",
+    "Barangnya rusak dan sangat mengecewakan",
+    "Kualitas lumayan, harga sesuai, packing kurang rapi",
+    "This product is amazing, great quality and fast shipping.",
+    "Terrible quality, the worst purchase I have made.",
+    "It is okay, nothing special but it works.",
+    "Pengiriman lama, tapi penjualnya ramah dan barangnya bagus",
+    "The battery died after two days, very disappointed.",
+]
+
+def export_model(source: str, output_dir: str, revision: str = "main", opset: int = 14):
+    """Write model.onnx, model-int8.onnx, the tokenizer and config to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Loading {source}...")
+    tokenizer = AutoTokenizer.from_pretrained(source, revision=revision)
+    model = AutoModelForSequenceClassification.from_pretrained(source, revision=revision)
+    model.eval()
+
+    onnx_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    dummy = tokenizer(SAMPLE_REVIEWS[:2], padding=True, return_tensors="pt")
+    print(f"Exporting to {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+
+    int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+    print(f"Quantising to {int8_path}...")
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+
+    torch_pipeline = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+    return torch_pipeline
+
+def _throughput(analyzer, texts, rounds: int = 10) -> float:
+    analyzer(texts, batch_size=len(texts))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        analyzer(texts, batch_size=len(texts))
+    return rounds * len(texts) / (time.perf_counter() - start)
+
+def verify(torch_pipeline, output_dir: str):
+    """Compare labels with the torch pipeline and report reviews per second"""
+    expected = [result["label"] for result in torch_pipeline(SAMPLE_REVIEWS)]
+    print(f"torch:     {_throughput(torch_pipeline, SAMPLE_REVIEWS):.1f} reviews/s")
+    for quantized in (False, True):
+        name = "onnx-int8" if quantized else "onnx"
+        analyzer = OnnxSentimentPipeline(output_dir, quantized=quantized)
+        labels = [result["label"] for result in analyzer(SAMPLE_REVIEWS)]
+        agreement = sum(a == b for a, b in zip(expected, labels))
+        print(f"{name + ':':<10} {_throughput(analyzer, SAMPLE_REVIEWS):.1f} reviews/s, "
+              f"labels match torch on {agreement}/{len(SAMPLE_REVIEWS)} samples")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the sentiment model to ONNX (fp32 and int8)")
+    parser.add_argument("--source", default=SENTIMENT_MODEL_PATH or SENTIMENT_MODEL_NAME,
+                        help="Hub model name or local model directory")
+    parser.add_argument("--revision", default="main", help="Hub branch, tag or commit hash to pin")
+    parser.add_argument("--output", default=SENTIMENT_ONNX_PATH, help="Target directory for the ONNX files")
+    parser.add_argument("--opset", type=int, default=14, help="ONNX opset version")
+    args = parser.parse_args()
+
+    torch_pipeline = export_model(args.source, args.output, args.revision, args.opset)
+    verify(torch_pipeline, args.output)
+    print(f"✓ ONNX model saved to {args.output}")
+    print(f"  Add to .env: SENTIMENT_BACKEND=onnx-int8 and SENTIMENT_ONNX_PATH={args.output}")
@@ -0,0 +1,88 @@
+"""
+Client for the sentiment inference server (inference_server.py).
+Messages are length-prefixed JSON over a Unix domain socket: a 4-byte
+big-endian length followed by the UTF-8 encoded JSON body. Each thread
+keeps its own persistent connection.
+"""
+import json
+import socket
+import struct
+import threading
+from typing import List
+
+_LENGTH = struct.Struct(">I")
+# Batas ukuran satu pesan (melindungi server dari permintaan yang rusak)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+class InferenceServerError(Exception):
+    """The inference server could not be reached or reported an error"""
+
+def send_message(sock: socket.socket, payload: dict):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def recv_message(sock: socket.socket) -> dict:
+    """Read one message; raises ConnectionError when the peer has closed the connection"""
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message too large ({size} bytes)")
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+class InferenceClient:
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def request(self, payload: dict) -> dict:
+        """Send one request and wait for its response, reconnecting once if the connection went stale"""
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, payload)
+                response = recv_message(sock)
+                break
+            except (OSError, ConnectionError) as e:
+                self._close()
+                if attempt == 1:
+                    raise InferenceServerError(f"Inference server at {self.socket_path} unavailable: {e}")
+        if "error" in response:
+            raise InferenceServerError(response["error"])
+        return response
+
+    def predict(self, texts: List[str]) -> List[dict]:
+        """Raw {'label', 'score'} prediction per text"""
+        return self.request({"op": "predict", "texts": texts})["results"]
+
+    def stats(self) -> dict:
+        return self.request({"op": "stats"})["stats"]
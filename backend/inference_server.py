@@ -0,0 +1,108 @@
+"""
+Sentiment inference server.
+Loads the sentiment model once and serves predictions to every API worker
+over a Unix domain socket, so N uvicorn workers share one copy of the
+model. Requests from all workers go through one micro-batcher, and the
+server has its own inference thread budget.
+
+Run:   python inference_server.py
+Then start the API with SENTIMENT_SERVER_SOCKET set to the same path.
+"""
+import argparse
+import os
+import socketserver
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server ini selalu menjalankan model secara lokal, meskipun .env berisi SENTIMENT_SERVER_SOCKET
+# (variabel yang sama dipakai worker API untuk menemukan server); string kosong tidak ditimpa load_dotenv
+SOCKET_PATH = os.getenv("SENTIMENT_SERVER_SOCKET") or "/tmp/review-analyzer-sentiment.sock"
+os.environ["SENTIMENT_SERVER_SOCKET"] = ""
+
+import sentiment_analyzer
+from micro_batcher import MicroBatcher
+from inference_client import send_message, recv_message
+
+# Jumlah thread inferensi milik server (default: semua core)
+INFERENCE_SERVER_THREADS = int(os.getenv("INFERENCE_SERVER_THREADS", str(os.cpu_count() or 1)))
+INFERENCE_SERVER_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_SERVER_MAX_BATCH_SIZE", "32"))
+INFERENCE_SERVER_MAX_WAIT_MS = float(os.getenv("INFERENCE_SERVER_MAX_WAIT_MS", "5"))
+
+_started_at = time.time()
+
+# Teks dari semua worker API digabung menjadi satu forward pass
+batcher = MicroBatcher(
+    sentiment_analyzer._predict_texts_local,
+    max_batch_size=INFERENCE_SERVER_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_SERVER_MAX_WAIT_MS,
+    name="inference-server-batcher"
+)
+
+def apply_thread_budget(threads: int):
+    """Limit the inference runtime of this process to `threads` threads"""
+    global INFERENCE_SERVER_THREADS
+    INFERENCE_SERVER_THREADS = max(1, threads)
+    sentiment_analyzer.set_inference_threads(INFERENCE_SERVER_THREADS)
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Satu koneksi per thread worker API, dipakai untuk banyak permintaan
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                response = self._dispatch(request)
+            except Exception as e:
+                response = {"error": str(e)}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+    def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "predict":
+            futures = [batcher.submit_async(text) for text in request["texts"]]
+            return {"results": [future.result() for future in futures]}
+        if op == "stats":
+            return {"stats": {
+                "backend": sentiment_analyzer.SENTIMENT_BACKEND,
+                "threads": INFERENCE_SERVER_THREADS,
+                "uptime": round(time.time() - _started_at, 1),
+                "batcher": batcher.stats(),
+                "chunking": sentiment_analyzer.chunking_stats(),
+            }}
+        raise ValueError(f"Unknown op '{op}'")
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(socket_path: str, threads: int):
+    apply_thread_budget(threads)
+    sentiment_analyzer.warmup_sentiment_model()
+    if not sentiment_analyzer.is_model_ready():
+        raise SystemExit(f"✗ Sentiment model failed to load: {sentiment_analyzer.model_status()}")
+
+    # Hapus socket sisa dari proses sebelumnya
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with InferenceServer(socket_path, InferenceRequestHandler) as server:
+        print(f"✓ Inference server listening on {socket_path} "
+              f"(backend: {sentiment_analyzer.SENTIMENT_BACKEND}, threads: {threads})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nInference server stopped")
+        finally:
+            os.unlink(socket_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve sentiment predictions over a Unix socket")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--threads", type=int, default=INFERENCE_SERVER_THREADS, help="Inference thread budget")
+    args = parser.parse_args()
+    serve(args.socket, args.threads)
@@ -1,14 +1,18 @@
 """
 Database initialization script.
-Run this to create the database tables.
+Run this to create the database tables, and after each deploy that adds an
+index: indexes on existing tables are built here (CREATE INDEX CONCURRENTLY
+on PostgreSQL), not during API startup.
 """
-from database import engine, Base
-from models import Review
+from database import engine, Base, upgrade_schema, create_indexes
+from models import Review, AnalysisJob, AnalysisCache
 
 def init_db():
     """Create all database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    create_indexes(engine)
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
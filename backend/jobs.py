@@ -0,0 +1,215 @@
+"""
+Background analysis jobs.
+A review is stored immediately with the fast rule-based sentiment; a local
+pool of worker threads then fills in the ML sentiment and key points.
+Job state lives in the analysis_jobs table, so queued work survives restarts.
+"""
+import os
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from sqlalchemy import update
+
+from database import SessionLocal
+from models import Review, AnalysisJob
+from sentiment_analyzer import analyze_sentiment, _analyze_sentiment_indonesian, ANALYZER_VERSION
+from key_points_extractor import extract_key_points_with_source, llm_configured, SOURCE_SIMPLE
+import result_cache
+# Diimpor agar tabel statistik sentimen ikut diperbarui saat job menulis hasil
+import review_stats
+from language_detector import detect_language
+
+load_dotenv()
+
+# Jumlah thread worker yang memproses job
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Total percobaan per job sebelum ditandai gagal
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Jeda awal sebelum mencoba ulang (detik), dilipatgandakan tiap percobaan
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2.0"))
+# Ambil ulang job yang tertunda saat startup; pada mode prefork hanya satu worker yang melakukannya
+JOB_REQUEUE_ON_STARTUP = os.getenv("JOB_REQUEUE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Job berstatus running yang tidak diperbarui selama ini (detik) dianggap ditinggalkan prosesnya
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+# Maksimum panggilan Gemini/Groq yang berjalan bersamaan dari job
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_queue = queue.Queue()
+_llm_slots = threading.BoundedSemaphore(max(1, LLM_MAX_CONCURRENCY))
+_workers = []
+
+def create_job(db, review_text: str) -> AnalysisJob:
+    """Persist the review with rule-based sentiment plus a queued job, then enqueue it"""
+    db_review = Review(
+        review_text=review_text,
+        sentiment=_analyze_sentiment_indonesian(review_text),
+        key_points=None
+    )
+    job = AnalysisJob(review=db_review, status=JOB_QUEUED, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    enqueue(job.id)
+    return job
+
+def enqueue(job_id: int, delay: float = 0):
+    """Put a job on the local queue, optionally after a delay"""
+    if delay > 0:
+        timer = threading.Timer(delay, _queue.put, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+    else:
+        _queue.put(job_id)
+
+def _claim_job(db, job_id: int) -> bool:
+    """Atomically move a queued job to running; False when another worker or process got it first"""
+    result = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.status == JOB_QUEUED)
+        .values(status=JOB_RUNNING, attempts=AnalysisJob.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+class ProviderUnavailable(Exception):
+    """Gemini and Groq both failed, so only the simple fallback key points were produced"""
+
+def _fail_attempt(job_id: int, error: str):
+    """Record a failed attempt: re-queue with backoff, or mark failed after JOB_MAX_ATTEMPTS"""
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        if job is None:
+            return
+        job.error = error[:500]
+        if job.attempts < JOB_MAX_ATTEMPTS:
+            job.status = JOB_QUEUED
+            db.commit()
+            enqueue(job_id, delay=JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1)))
+        else:
+            job.status = JOB_FAILED
+            db.commit()
+
+def _process_job(job_id: int):
+    """Run the slow analysis stages for one job and store the results"""
+    # Sesi hanya dibuka sebentar untuk klaim dan untuk menulis hasil; tidak ada koneksi
+    # yang ditahan selama inferensi model dan panggilan LLM
+    with SessionLocal() as db:
+        # Job yang sama bisa masuk antrean beberapa proses (uvicorn --workers N); hanya satu yang menjalankannya
+        if not _claim_job(db, job_id):
+            return
+        job = db.get(AnalysisJob, job_id)
+        if job is None:
+            return
+        if job.review is None:
+            job.status = JOB_FAILED
+            job.error = "Review was deleted before analysis finished"
+            db.commit()
+            return
+        review_text = job.review.review_text
+        attempts = job.attempts
+    
+    try:
+        with SessionLocal() as db:
+            cached = result_cache.lookup(db, review_text)
+        cache_result = False
+        if cached:
+            sentiment, key_points = cached
+        else:
+            language = detect_language(review_text)
+            sentiment = analyze_sentiment(review_text, language)
+            # Batasi jumlah panggilan LLM paralel agar kuota tidak habis saat beban puncak
+            with _llm_slots:
+                key_points, source = extract_key_points_with_source(review_text, language)
+            # Provider gagal (bukan tidak dikonfigurasi): coba lagi nanti; poin sederhana
+            # baru diterima sebagai hasil akhir pada percobaan terakhir
+            if source == SOURCE_SIMPLE and llm_configured() and attempts < JOB_MAX_ATTEMPTS:
+                raise ProviderUnavailable("Gemini and Groq are unavailable, retrying key point extraction")
+            cache_result = source != SOURCE_SIMPLE
+        
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return
+            review = job.review
+            if review is None:
+                job.status = JOB_FAILED
+                job.error = "Review was deleted before analysis finished"
+                db.commit()
+                return
+            review.sentiment = sentiment
+            review.key_points = key_points
+            review.analysis_version = ANALYZER_VERSION
+            if cache_result:
+                result_cache.store(db, review_text, sentiment, key_points)
+            job.status = JOB_SUCCEEDED
+            job.error = None
+            db.commit()
+    except Exception as e:
+        _fail_attempt(job_id, str(e))
+
+def _worker_loop():
+    while True:
+        job_id = _queue.get()
+        try:
+            if job_id is None:
+                return
+            _process_job(job_id)
+        except Exception as e:
+            print(f"Error processing analysis job {job_id}: {e}")
+        finally:
+            _queue.task_done()
+
+def _requeue_pending():
+    """
+    Enqueue queued jobs, after returning jobs whose running lease expired to
+    the queue. Jobs still running in another process are left alone.
+    """
+    db = SessionLocal()
+    try:
+        expired = datetime.now(timezone.utc) - timedelta(seconds=JOB_LEASE_SECONDS)
+        reset = db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.status == JOB_RUNNING, AnalysisJob.updated_at < expired)
+            .values(status=JOB_QUEUED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if reset:
+            print(f"Returned {reset} abandoned running job(s) to the queue")
+        pending = db.query(AnalysisJob.id).filter(
+            AnalysisJob.status == JOB_QUEUED
+        ).order_by(AnalysisJob.id).all()
+        for (job_id,) in pending:
+            enqueue(job_id)
+        if pending:
+            print(f"Re-queued {len(pending)} pending analysis job(s)")
+    except Exception as e:
+        print(f"Warning: Could not re-queue pending analysis jobs: {e}")
+    finally:
+        db.close()
+
+def start_workers():
+    """Start the worker pool (idempotent) and pick up unfinished jobs"""
+    if _workers:
+        return
+    for i in range(max(1, JOB_WORKERS)):
+        worker = threading.Thread(target=_worker_loop, name=f"analysis-job-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+    if JOB_REQUEUE_ON_STARTUP:
+        _requeue_pending()
+
+def stop_workers(timeout: float = 5.0):
+    """Ask every worker to exit after its current job"""
+    for _ in _workers:
+        _queue.put(None)
+    for worker in _workers:
+        worker.join(timeout=timeout)
+    _workers.clear()
@@ -1,8 +1,15 @@
 import google.generativeai as genai
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 from dotenv import load_dotenv
 
+import llm_guard
+from language_detector import detect_language
+
 load_dotenv()
 
 # Inisialisasi API Gemini
@@ -13,137 +20,175 @@ if GEMINI_API_KEY:
 # Inisialisasi API Groq (cadangan)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+# Naikkan setiap kali prompt atau post-processing berubah (bagian dari kunci cache hasil)
+PROMPT_VERSION = "3"
 
-def _detect_language(text: str) -> str:
-    """
-    Detect if text is in Indonesian or English.
-    Returns 'id' for Indonesian, 'en' for English.
-    Improved detection with more Indonesian indicators.
-    """
-    # Kata dan pola Bahasa Indonesia umum (diperluas untuk sensitivitas lebih baik)
-    indonesian_indicators = [
-        # Kata umum
-        'yang', 'dan', 'atau', 'dengan', 'untuk', 'dari', 'ini', 'itu', 'sangat', 'sekali',
-        'saya', 'kami', 'mereka', 'anda', 'sudah', 'belum', 'akan', 'tidak', 'bukan',
-        'jadi', 'juga', 'saja', 'sih', 'nih', 'dong', 'lah', 'kan', 'ya', 'gak', 'ga',
-        # Kata-kata sentimen
-        'bagus', 'jelek', 'buruk', 'mantap', 'keren', 'puas', 'kecewa', 'mengecewakan',
-        'memuaskan', 'sangat bagus', 'sangat baik', 'sangat puas', 'sangat memuaskan',
-        'luar biasa', 'sempurna', 'terbaik', 'paling bagus', 'paling baik',
-        # Terkait produk
-        'produk', 'barang', 'kualitas', 'harga', 'pelayanan', 'pengiriman', 'rekomendasi',
-        'direkomendasikan', 'tidak direkomendasikan', 'worth it', 'sangat worth it',
-        # Frasa umum
-        'banget', 'amat', 'terlalu', 'cukup', 'lumayan', 'agak', 'sedikit',
-        'suka', 'senang', 'terkesan', 'impressed', 'love it', 'suka banget',
-        'ada masalah', 'banyak masalah', 'sering masalah', 'tidak sesuai', 'tidak cocok',
-        'kurang baik', 'kurang bagus', 'kurang memuaskan', 'rugi', 'buang uang',
-        # Bentuk kepemilikan (sangat khas Indonesia)
-        'produknya', 'barangnya', 'kualitasnya', 'harganya', 'pelayanannya', 'pengirimannya',
-        'rasanya', 'tampilannya', 'kemasannya', 'packagingnya',
-        # Spesifik makanan/rasa
-        'enak', 'enak dimakan', 'lezat', 'nikmat', 'sedap', 'gurih', 'manis',
-        # Spesifik penampilan
-        'cantik', 'menarik', 'indah', 'rapi', 'bersih', 'tampilannya',
-        # Pola gabungan
-        'keren dan', 'bagus dan', 'enak dan', 'keren enak', 'bagus enak',
-        'produknya keren', 'produknya bagus', 'produknya enak', 'barangnya keren'
-    ]
-    
-    text_lower = text.lower()
-    
-    # Hitung indikator Bahasa Indonesia
-    indonesian_count = 0
-    for indicator in indonesian_indicators:
-        if indicator in text_lower:
-            indonesian_count += 1
-    
-    # Periksa pola khusus Bahasa Indonesia (diperluas)
-    indonesian_patterns = [
-        r'\b(sangat|amat|terlalu|banget)\s+(bagus|baik|jelek|buruk|puas|kecewa|enak|lezat|keren)',
-        r'\b(paling|ter)\s+(bagus|baik|jelek|buruk)',
-        r'\b(tidak|belum|bukan)\s+(bagus|baik|puas|memuaskan|direkomendasikan)',
-        r'\b(kurang|agak|sedikit)\s+(bagus|baik|puas|memuaskan)',
-        r'\b(suka|senang|terkesan)\s+(banget|sekali)',
-        r'\b(worth|worth it)\s+(banget|sekali)',
-        # Pola kepemilikan (sangat khas Indonesia)
-        r'\b(produk|barang|kualitas|harga|rasa|tampilan|kemasan|packaging)nya\s+',
-        r'\b(produknya|barangnya)\s+(keren|bagus|enak|mantap|jelek|buruk)',
-        r'\b(rasanya|tampilannya)\s+(enak|lezat|keren|bagus)',
-        # Pola gabungan
-        r'\b(keren|bagus|mantap)\s+dan\s+(enak|lezat|bagus|keren)',
-        r'\b(enak|lezat)\s+(dimakan|rasanya|banget)',
-        r'\b(keren|bagus|mantap)\s+(enak|lezat)\s+dimakan',
-    ]
-    
-    pattern_matches = sum(1 for pattern in indonesian_patterns if re.search(pattern, text_lower))
-    
-    # Periksa urutan kata Bahasa Indonesia (subjek-kata kerja-objek khas)
-    indonesian_word_order_patterns = [
-        r'\b\w+nya\s+(keren|bagus|enak|mantap|jelek|buruk)',  # "produknya keren"
-        r'\b\w+nya\s+dan\s+\w+',  # "produknya keren dan enak"
-    ]
-    
-    word_order_matches = sum(1 for pattern in indonesian_word_order_patterns if re.search(pattern, text_lower))
-    
-    # Jika ditemukan indikator/pola/urutan kata Indonesia, kemungkinan bahasa adalah Indonesia
-    # Turunkan ambang untuk deteksi ulasan pendek yang lebih baik
-    if indonesian_count >= 1 or pattern_matches >= 1 or word_order_matches >= 1:
-        return 'id'
-    
-    return 'en'
+# Sumber poin utama yang dihasilkan extract_key_points_with_source
+SOURCE_GEMINI = "gemini"
+SOURCE_GROQ = "groq"
+SOURCE_SIMPLE = "simple"
+
+# Jumlah panggilan LLM paralel saat mengekstrak poin untuk banyak review
+KEY_POINTS_BATCH_CONCURRENCY = int(os.getenv("KEY_POINTS_BATCH_CONCURRENCY", "4"))
 
 
-def extract_key_points(review_text: str) -> str:
+def extract_key_points(review_text: str, language: str = None) -> str:
     """
     Extract key points from the review using AI APIs.
     Priority: Gemini → Groq → Simple Extraction
+    Pass `language` when it was already detected for this review.
     Returns: A string containing key points extracted from the review.
     """
+    return extract_key_points_with_source(review_text, language)[0]
+
+
+def extract_key_points_with_source(review_text: str, language: str = None) -> Tuple[str, str]:
+    """
+    Same as extract_key_points, but also report which step produced the
+    result: 'gemini', 'groq' or 'simple'.
+    """
+    # Bahasa dideteksi sekali dan dipakai oleh semua langkah di bawah
+    language = language or detect_language(review_text)
+    
+    # Provider yang kuotanya habis (breaker terbuka / token habis) dilewati tanpa panggilan jaringan
     # Langkah 1: Coba API Gemini
-    if GEMINI_API_KEY:
-        result = _try_gemini_extraction(review_text)
+    if GEMINI_API_KEY and not llm_guard.provider_exhausted("gemini", _available_gemini_models()):
+        result = _try_gemini_extraction(review_text, language)
         if result:
-            return result
+            return result, SOURCE_GEMINI
     
     # Langkah 2: Coba API Groq (cadangan)
-    if GROQ_API_KEY:
-        result = _try_groq_extraction(review_text)
+    if GROQ_API_KEY and not llm_guard.provider_exhausted("groq", GROQ_MODELS):
+        result = _try_groq_extraction(review_text, language)
         if result:
-            return result
+            return result, SOURCE_GROQ
     
     # Langkah 3: Cadangan ke ekstraksi sederhana
     print("Warning: No AI API available, using simple extraction")
-    return _simple_key_points_extraction(review_text)
+    return _simple_key_points_extraction(review_text, language), SOURCE_SIMPLE
+
+
+def llm_configured() -> bool:
+    """True when at least one LLM provider (Gemini or Groq) has an API key"""
+    return bool(GEMINI_API_KEY or GROQ_API_KEY)
+
+
+def extract_key_points_batch(review_texts: List[str], with_source: bool = False) -> List:
+    """
+    Extract key points for many reviews.
+    Duplicate texts are extracted once and the LLM round trips run on a
+    bounded thread pool (KEY_POINTS_BATCH_CONCURRENCY) instead of serially.
+    Returns one key points string per input text, in order, or
+    (key_points, source) tuples when with_source is True.
+    """
+    if not review_texts:
+        return []
+    
+    extractor = extract_key_points_with_source if with_source else extract_key_points
+    unique_texts = list(dict.fromkeys(review_texts))
+    max_workers = max(1, min(KEY_POINTS_BATCH_CONCURRENCY, len(unique_texts)))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = dict(zip(unique_texts, pool.map(extractor, unique_texts)))
+    
+    return [results[text] for text in review_texts]
+
+
+# Model Gemini yang dicoba (terbaru dulu)
+GEMINI_MODELS = [
+    'gemini-2.5-flash',      # Latest fast model (recommended)
+    'gemini-2.5-pro',        # Latest capable model
+    'gemini-2.0-flash',      # Previous version
+    'gemini-flash-latest',   # Latest flash (alias)
+    'gemini-pro-latest',     # Latest pro (alias)
+    'gemini-1.5-flash',      # Older version (fallback)
+    'gemini-1.5-pro',        # Older version (fallback)
+    'gemini-pro',            # Legacy (last resort)
+]
+
+# Model Groq yang dicoba (tercepat dulu)
+GROQ_MODELS = [
+    'llama-3.1-8b-instant',  # Fast and efficient
+    'llama-3.1-70b-versatile', # More capable
+    'llama-3-8b-8192',        # Alternative
+    'mixtral-8x7b-32768',     # Mixtral model
+]
+
+# Berapa lama (detik) model Gemini yang berhasil diingat sebelum urutan prioritas dicek ulang
+GEMINI_MODEL_TTL = float(os.getenv("GEMINI_MODEL_TTL", "3600"))
+
+_gemini_lock = threading.Lock()
+_gemini_clients = {}
+_gemini_unavailable = set()
+_gemini_active_model = None
+_gemini_active_until = 0.0
+
+
+def _get_gemini_client(model_name: str):
+    """Reuse one GenerativeModel instance per model name"""
+    with _gemini_lock:
+        client = _gemini_clients.get(model_name)
+        if client is None:
+            client = genai.GenerativeModel(model_name)
+            _gemini_clients[model_name] = client
+        return client
+
+
+def _gemini_candidates():
+    """
+    Yield (model_name, model) in the order they should be tried.
+    The known-good model comes first while its TTL holds; models that
+    returned 404 are skipped for the rest of the process lifetime.
+    """
+    with _gemini_lock:
+        active = _gemini_active_model if time.monotonic() < _gemini_active_until else None
+        unavailable = set(_gemini_unavailable)
+    
+    if active and active not in unavailable:
+        yield active, _get_gemini_client(active)
+    for model_name in GEMINI_MODELS:
+        if model_name == active or model_name in unavailable:
+            continue
+        yield model_name, _get_gemini_client(model_name)
+
+
+def _available_gemini_models():
+    with _gemini_lock:
+        return [model_name for model_name in GEMINI_MODELS if model_name not in _gemini_unavailable]
 
 
-def _try_gemini_extraction(review_text: str) -> str:
+def _remember_gemini_model(model_name: str):
+    global _gemini_active_model, _gemini_active_until
+    with _gemini_lock:
+        if _gemini_active_model != model_name or time.monotonic() >= _gemini_active_until:
+            print(f"✓ Using Gemini model {model_name} for key points extraction")
+            _gemini_active_model = model_name
+            _gemini_active_until = time.monotonic() + GEMINI_MODEL_TTL
+
+
+def _mark_gemini_model_unavailable(model_name: str):
+    global _gemini_active_model
+    with _gemini_lock:
+        _gemini_unavailable.add(model_name)
+        _gemini_clients.pop(model_name, None)
+        if _gemini_active_model == model_name:
+            _gemini_active_model = None
+
+
+def gemini_model_status() -> dict:
+    """Currently resolved Gemini model and blacklisted model names"""
+    with _gemini_lock:
+        active = _gemini_active_model if time.monotonic() < _gemini_active_until else None
+        return {"active_model": active, "unavailable_models": sorted(_gemini_unavailable)}
+
+
+def _try_gemini_extraction(review_text: str, language: str) -> str:
     """Try to extract key points using Gemini API"""
     if not GEMINI_API_KEY:
         return None
     
-    # Deteksi bahasa
-    language = _detect_language(review_text)
-    
-    # Coba model Gemini berbeda (terbaru dulu)
-    models_to_try = [
-        'gemini-2.5-flash',      # Latest fast model (recommended)
-        'gemini-2.5-pro',        # Latest capable model
-        'gemini-2.0-flash',      # Previous version
-        'gemini-flash-latest',   # Latest flash (alias)
-        'gemini-pro-latest',     # Latest pro (alias)
-        'gemini-1.5-flash',      # Older version (fallback)
-        'gemini-1.5-pro',        # Older version (fallback)
-        'gemini-pro',            # Legacy (last resort)
-    ]
-    
-    for model_name in models_to_try:
-        try:
-            model = genai.GenerativeModel(model_name)
-            
-            # Buat prompt khusus bahasa (ditingkatkan untuk Bahasa Indonesia dengan sensitivitas lebih tinggi)
-            if language == 'id':
-                prompt = f"""Analisis review produk berikut dengan SENSITIVITAS SANGAT TINGGI terhadap nuansa bahasa Indonesia. Pahami konteks, ekspresi sehari-hari, pola kalimat, dan makna tersirat dengan sangat detail.
+    # Buat prompt khusus bahasa (ditingkatkan untuk Bahasa Indonesia dengan sensitivitas lebih tinggi)
+    if language == 'id':
+        prompt = f"""Analisis review produk berikut dengan SENSITIVITAS SANGAT TINGGI terhadap nuansa bahasa Indonesia. Pahami konteks, ekspresi sehari-hari, pola kalimat, dan makna tersirat dengan sangat detail.
 
 Teks review:
 {review_text}
@@ -205,8 +250,8 @@ Instruksi analisis (SANGAT PENTING - baca dengan teliti):
      • Pengguna mengatakan bahwa produk ini keren dan enak dimakan
 
 Jawab LANGSUNG dengan poin-poin penting, tanpa header, pengantar, atau penjelasan tambahan. Gunakan format bullet point (•) untuk setiap poin. Fokus pada informasi SPESIFIK dan RELEVAN."""
-            else:
-                prompt = f"""Analyze the following product review and extract the key points concisely.
+    else:
+        prompt = f"""Analyze the following product review and extract the key points concisely.
                 
 Focus on:
 - Main concerns or praises
@@ -218,31 +263,54 @@ Review text:
 {review_text}
 
 Provide a concise summary of key points (3-5 points, max 2 lines per point). Be brief and relevant."""
-            
+    
+    # Model yang terakhir berhasil dicoba pertama; model yang 404 tidak pernah dicoba lagi
+    bucket = llm_guard.get_bucket("gemini")
+    for model_name, model in _gemini_candidates():
+        breaker = llm_guard.get_breaker("gemini", model_name)
+        if not breaker.allow():
+            continue
+        if not bucket.try_acquire():
+            breaker.cancel()
+            print("Gemini local rate limit reached, trying Groq...")
+            return None
+        try:
             response = model.generate_content(prompt)
-            if response and response.text:
-                result = response.text.strip()
-                # Post-proses untuk memastikan ringkas
-                if language == 'id':
-                    result = _post_process_indonesian(result)
-                return result
+            # response.text melempar error jika kandidat diblokir atau kosong,
+            # jadi keberhasilan baru dicatat setelah teksnya terbaca
+            result = response.text.strip() if response else ""
+            if not result:
+                breaker.record_failure("Empty response")
+                continue
+            breaker.record_success()
+            _remember_gemini_model(model_name)
+            # Post-proses untuk memastikan ringkas
+            if language == 'id':
+                result = _post_process_indonesian(result)
+            return result
         except Exception as e:
             error_msg = str(e)
             # Jika model tidak ditemukan, coba model berikutnya
             if '404' in error_msg or 'not found' in error_msg.lower() or 'not supported' in error_msg.lower():
+                _mark_gemini_model_unavailable(model_name)
+                breaker.cancel()
+                # Pencarian model yang 404 tidak dihitung ke batas laju, agar cold start tidak menghabiskan token
+                bucket.refund()
                 continue
-            elif '429' in error_msg or 'quota' in error_msg.lower() or 'rate limit' in error_msg.lower():
-                # Kuota terlampaui - coba Groq sebagai gantinya
+            elif llm_guard.is_quota_error(error_msg):
+                # Kuota terlampaui - buka breaker model ini dan coba Groq sebagai gantinya
+                breaker.record_failure(error_msg, quota_exceeded=True)
                 print(f"Gemini quota exceeded, trying Groq...")
                 return None
             else:
                 # Error lain - coba model berikutnya
+                breaker.record_failure(error_msg)
                 continue
     
     return None
 
 
-def _try_groq_extraction(review_text: str) -> str:
+def _try_groq_extraction(review_text: str, language: str) -> str:
     """Try to extract key points using Groq API"""
     if not GROQ_API_KEY:
         return None
@@ -252,17 +320,6 @@ def _try_groq_extraction(review_text: str) -> str:
         
         client = Groq(api_key=GROQ_API_KEY)
         
-        # Deteksi bahasa
-        language = _detect_language(review_text)
-        
-        # Coba model Groq berbeda (tercepat dulu)
-        models_to_try = [
-            'llama-3.1-8b-instant',  # Fast and efficient
-            'llama-3.1-70b-versatile', # More capable
-            'llama-3-8b-8192',        # Alternative
-            'mixtral-8x7b-32768',     # Mixtral model
-        ]
-        
         # Buat prompt khusus bahasa (ditingkatkan untuk Bahasa Indonesia dengan sensitivitas lebih tinggi)
         if language == 'id':
             prompt = f"""Analisis review produk berikut dengan SENSITIVITAS SANGAT TINGGI terhadap nuansa bahasa Indonesia. Pahami konteks, ekspresi sehari-hari, pola kalimat, dan makna tersirat dengan sangat detail.
@@ -375,7 +432,16 @@ Review text:
 Provide a concise summary of key points (3-5 points, max 2 lines per point). Be brief and relevant."""
             system_prompt = "You are a helpful assistant that extracts key points from product reviews. Be concise and relevant."
         
-        for model_name in models_to_try:
+        bucket = llm_guard.get_bucket("groq")
+        for model_name in GROQ_MODELS:
+            # Model yang kuotanya habis dilewati sampai masa cool-down breaker selesai
+            breaker = llm_guard.get_breaker("groq", model_name)
+            if not breaker.allow():
+                continue
+            if not bucket.try_acquire():
+                breaker.cancel()
+                print("Groq local rate limit reached, using simple extraction...")
+                return None
             try:
                 response = client.chat.completions.create(
                     model=model_name,
@@ -393,25 +459,33 @@ Provide a concise summary of key points (3-5 points, max 2 lines per point). Be
                     max_tokens=200
                 )
                 
+                content = None
                 if response and response.choices and len(response.choices) > 0:
                     content = response.choices[0].message.content
-                    if content:
-                        print(f"✓ Using Groq ({model_name}) for key points extraction")
-                        result = content.strip()
-                        # Post-proses untuk Bahasa Indonesia
-                        if language == 'id':
-                            result = _post_process_indonesian(result)
-                        return result
+                result = content.strip() if content else ""
+                # Jawaban kosong dihitung sebagai kegagalan, bukan keberhasilan
+                if not result:
+                    breaker.record_failure("Empty response")
+                    continue
+                breaker.record_success()
+                print(f"✓ Using Groq ({model_name}) for key points extraction")
+                # Post-proses untuk Bahasa Indonesia
+                if language == 'id':
+                    result = _post_process_indonesian(result)
+                return result
             except Exception as e:
                 error_msg = str(e)
                 # Jika model tidak ditemukan atau kuota terlampaui, coba model berikutnya
                 if '404' in error_msg or 'not found' in error_msg.lower():
+                    breaker.record_failure(error_msg)
                     continue
-                elif '429' in error_msg or 'quota' in error_msg.lower() or 'rate limit' in error_msg.lower():
+                elif llm_guard.is_quota_error(error_msg):
+                    breaker.record_failure(error_msg, quota_exceeded=True)
                     print(f"Groq quota exceeded for {model_name}, trying next model...")
                     continue
                 else:
                     # Error lain - coba model berikutnya
+                    breaker.record_failure(error_msg)
                     continue
         
         return None
@@ -608,14 +682,14 @@ def _post_process_indonesian(text: str) -> str:
     return result
 
 
-def _simple_key_points_extraction(review_text: str) -> str:
+def _simple_key_points_extraction(review_text: str, language: str = None) -> str:
     """
     Simple key points extraction as fallback when AI APIs are not available.
     Uses basic text analysis to extract key points.
     Supports both Indonesian and English.
     """
     # Deteksi bahasa
-    language = _detect_language(review_text)
+    language = language or detect_language(review_text)
     
     # Pecah menjadi kalimat
     sentences = re.split(r'[.!?]+', review_text)
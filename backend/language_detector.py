@@ -0,0 +1,248 @@
+"""
+Shared Indonesian/English language detection.
+Used by both the sentiment and the key points pipelines, so a review is
+scanned once: the verdict is memoised per text and can be passed through
+analyze_sentiment() and extract_key_points() as the `language` argument.
+
+The default detector is a naive Bayes classifier over hashed word and
+character-trigram features, trained offline by train_language_model.py on
+the bundled corpus in language_data/ and stored as a flat float array.
+Texts the model is unsure about (very short, emoji only) get a configured
+default language. The older indicator/pattern detector is kept for
+LANGUAGE_DETECTOR=legacy and for benchmarking (bench_language_detector.py).
+"""
+import math
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Jumlah teks terakhir yang hasil deteksinya diingat
+LANGUAGE_CACHE_SIZE = int(os.getenv("LANGUAGE_CACHE_SIZE", "4096"))
+# 'ngram' (model terlatih) atau 'legacy' (pencocokan indikator)
+LANGUAGE_DETECTOR = os.getenv("LANGUAGE_DETECTOR", "ngram").lower()
+LANGUAGE_MODEL_PATH = os.getenv(
+    "LANGUAGE_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_model.bin")
+)
+# Di bawah kepercayaan ini, teks dianggap ambigu dan memakai LANGUAGE_DEFAULT
+LANGUAGE_MIN_CONFIDENCE = float(os.getenv("LANGUAGE_MIN_CONFIDENCE", "0.6"))
+
+LANGUAGE_ID = 'id'
+LANGUAGE_EN = 'en'
+
+# Bahasa untuk teks ambigu; detektor lama tidak dipakai karena pencocokan substring-nya
+# mengirim teks Inggris pendek ke 'id' (mis. "ga" di "gadget")
+LANGUAGE_DEFAULT = os.getenv("LANGUAGE_DEFAULT", LANGUAGE_EN).lower()
+if LANGUAGE_DEFAULT not in (LANGUAGE_ID, LANGUAGE_EN):
+    print(f"Warning: LANGUAGE_DEFAULT={LANGUAGE_DEFAULT!r} is not 'id' or 'en', using 'en'")
+    LANGUAGE_DEFAULT = LANGUAGE_EN
+
+# Kata dan frasa Bahasa Indonesia (dicocokkan sebagai substring)
+INDONESIAN_INDICATORS = [
+    # Kata umum
+    'yang', 'dan', 'atau', 'dengan', 'untuk', 'dari', 'ini', 'itu', 'sangat', 'sekali',
+    # Kata-kata sentimen
+    'bagus', 'jelek', 'buruk', 'mantap', 'keren', 'puas', 'kecewa', 'mengecewakan',
+    'memuaskan', 'sangat bagus', 'sangat baik', 'sangat puas', 'sangat memuaskan',
+    'luar biasa', 'sempurna', 'terbaik', 'paling bagus', 'paling baik',
+    # Terkait produk
+    'produk', 'barang', 'kualitas', 'harga', 'pelayanan', 'pengiriman', 'rekomendasi',
+    'direkomendasikan', 'tidak direkomendasikan', 'worth it', 'sangat worth it',
+    # Kata ganti dan kata umum
+    'saya', 'kami', 'mereka', 'anda', 'sudah', 'belum', 'akan', 'tidak', 'bukan',
+    # Partikel dan ekspresi umum
+    'jadi', 'juga', 'saja', 'sih', 'nih', 'dong', 'lah', 'kan', 'ya', 'gak', 'ga',
+    # Penguat (intensifier)
+    'banget', 'amat', 'terlalu', 'cukup', 'lumayan', 'agak', 'sedikit',
+    # Frasa umum
+    'suka', 'senang', 'terkesan', 'impressed', 'love it', 'suka banget',
+    'ada masalah', 'banyak masalah', 'sering masalah', 'tidak sesuai', 'tidak cocok',
+    'kurang baik', 'kurang bagus', 'kurang memuaskan', 'rugi', 'buang uang',
+    # Spesifik makanan/produk
+    'enak', 'enak dimakan', 'lezat', 'nikmat', 'sedap', 'gurih', 'manis', 'rasanya',
+    # Penampilan
+    'cantik', 'menarik', 'indah', 'rapi', 'bersih', 'tampilannya', 'tampilan',
+    # Pola gabungan
+    'keren dan', 'bagus dan', 'enak dan', 'keren enak', 'bagus enak',
+    'produknya keren', 'produknya bagus', 'produknya enak', 'barangnya keren',
+    # Bentuk kepemilikan (sangat khas Indonesia)
+    'produknya', 'barangnya', 'kualitasnya', 'harganya', 'pelayanannya',
+    'pengirimannya', 'kemasannya', 'packagingnya',
+    'nya', 'ku', 'mu', 'kita', 'kalian',
+    # Ekspresi Bahasa Indonesia umum lainnya
+    'si', 'deh', 'kok', 'loh', 'dah', 'tuh',
+    # Kata sambung Bahasa Indonesia
+    'tapi', 'tetapi', 'namun', 'meskipun', 'walaupun', 'karena', 'sehingga',
+    # Penanda waktu/tense Bahasa Indonesia
+    'sedang', 'telah', 'pernah', 'selalu', 'kadang',
+    # Kata tanya Bahasa Indonesia
+    'apa', 'siapa', 'kapan', 'dimana', 'kenapa', 'mengapa', 'bagaimana',
+    # Kata tunjuk Bahasa Indonesia
+    'sini', 'situ', 'sana',
+    # Preposisi Bahasa Indonesia
+    'di', 'ke', 'pada', 'oleh', 'kepada', 'terhadap',
+]
+
+# Pola khusus Bahasa Indonesia
+INDONESIAN_PATTERNS = [
+    # Pola makanan/rasa
+    r'\b(enak|lezat|nikmat|sedap|gurih)\s+(dimakan|rasanya|banget|sekali|sangat)',
+    r'\b(rasa|rasanya)\s+(enak|lezat|nikmat|sedap|gurih)',
+    r'\b(rasanya|tampilannya)\s+(enak|lezat|keren|bagus)',
+    # Pola penampilan
+    r'\b(keren|bagus|mantap|cantik|menarik)\s+(dan|enak|banget|sekali|sangat)',
+    r'\b(tampilan|tampilannya)\s+(keren|bagus|cantik|menarik|rapi)',
+    # Pola penguat (intensifier)
+    r'\b(sangat|amat|terlalu|banget)\s+(bagus|baik|jelek|buruk|puas|kecewa|enak|lezat|keren|mantap)',
+    r'\b(enak|keren|bagus|mantap)\s+(banget|sekali|sangat|amat)',
+    r'\b(paling|ter)\s+(bagus|baik|jelek|buruk)',
+    r'\b(suka|senang|terkesan)\s+(banget|sekali)',
+    r'\b(worth|worth it)\s+(banget|sekali)',
+    # Pola kepemilikan (sangat khas Bahasa Indonesia)
+    r'\b(produk|barang|kualitas|harga|pelayanan|pengiriman|kemasan|packaging|rasa|tampilan)nya\s+',
+    r'\b(produknya|barangnya)\s+(keren|bagus|enak|mantap|jelek|buruk)',
+    # Pola frasa umum Bahasa Indonesia
+    r'\b(keren|bagus|mantap)\s+dan\s+(enak|lezat|bagus|keren)',
+    r'\b(enak|lezat)\s+dan\s+(keren|bagus|mantap)',
+    r'\b(keren|bagus|mantap)\s+(enak|lezat)\s+dimakan',
+    # Pola negasi
+    r'\b(tidak|belum|bukan|kurang|agak|sedikit)\s+(bagus|baik|puas|memuaskan|direkomendasikan|enak|keren)',
+    # Pola rekomendasi
+    r'\b(direkomendasikan|rekomendasi|sarankan|disarankan)\s+(untuk|bagi|kepada)',
+    # Pola urutan kata (subjek-kata kerja-objek yang khas):
+    # Bahasa Indonesia sering menggunakan "produknya keren" vs Bahasa Inggris "the product is cool"
+    r'\b\w+nya\s+(keren|bagus|enak|mantap|jelek|buruk)',  # "produknya keren"
+    r'\b\w+nya\s+dan\s+\w+',  # "produknya keren dan enak"
+]
+
+# Satu indikator atau satu pola saja sudah cukup untuk menyimpulkan Bahasa Indonesia,
+# jadi pemeriksaan berhenti pada kecocokan pertama dan semua pola digabung menjadi satu regex
+_INDICATORS = tuple(dict.fromkeys(INDONESIAN_INDICATORS))
+_PATTERNS_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in INDONESIAN_PATTERNS))
+
+MODEL_MAGIC = b"LGID"
+MODEL_FORMAT_VERSION = 1
+# Header: magic, versi format, jumlah bucket, bias (log prior id - log prior en)
+_HEADER = struct.Struct("<4sHIf")
+# Hanya awal teks yang dibutuhkan untuk menentukan bahasa
+MAX_FEATURE_TOKENS = 48
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+def extract_features(text_lower: str) -> List[str]:
+    """Word and character-trigram features of a lower-cased text"""
+    features = []
+    for token in _TOKEN_RE.findall(text_lower)[:MAX_FEATURE_TOKENS]:
+        features.append(token)
+        padded = f" {token} "
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+def feature_bucket(feature: str, buckets: int) -> int:
+    # crc32 stabil antar proses (berbeda dengan hash() bawaan Python)
+    return zlib.crc32(feature.encode("utf-8")) % buckets
+
+class LanguageModel:
+    """Binary id/en naive Bayes weights: one log-likelihood ratio per feature bucket"""
+    def __init__(self, weights: array, bias: float):
+        self.weights = weights
+        self.bias = bias
+        self.buckets = len(weights)
+
+    @classmethod
+    def load(cls, path: str) -> "LanguageModel":
+        with open(path, "rb") as f:
+            magic, version, buckets, bias = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MODEL_MAGIC or version != MODEL_FORMAT_VERSION:
+                raise ValueError(f"Unsupported language model file: {path}")
+            weights = array("f")
+            weights.frombytes(f.read(buckets * weights.itemsize))
+        if len(weights) != buckets:
+            raise ValueError(f"Truncated language model file: {path}")
+        if sys.byteorder == "big":
+            weights.byteswap()
+        return cls(weights, bias)
+
+    def save(self, path: str):
+        weights = array("f", self.weights)
+        if sys.byteorder == "big":
+            weights.byteswap()
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MODEL_MAGIC, MODEL_FORMAT_VERSION, self.buckets, self.bias))
+            f.write(weights.tobytes())
+
+    def classify(self, text_lower: str) -> Tuple[str, float]:
+        """Return (language, probability of that language)"""
+        weights = self.weights
+        buckets = self.buckets
+        score = self.bias
+        for feature in extract_features(text_lower):
+            score += weights[zlib.crc32(feature.encode("utf-8")) % buckets]
+        # Hindari overflow untuk teks panjang dengan skor ekstrem
+        score = max(-30.0, min(30.0, score))
+        probability_id = 1 / (1 + math.exp(-score))
+        if probability_id >= 0.5:
+            return LANGUAGE_ID, probability_id
+        return LANGUAGE_EN, 1 - probability_id
+
+def _load_model() -> Optional[LanguageModel]:
+    if LANGUAGE_DETECTOR != "ngram":
+        return None
+    try:
+        return LanguageModel.load(LANGUAGE_MODEL_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Language model not available ({e}), using indicator-based detection")
+        return None
+
+_model = _load_model()
+
+def detect_language_legacy(text: str) -> str:
+    """Indicator/pattern based detection (previous behaviour)"""
+    text_lower = text.lower()
+    for indicator in _INDICATORS:
+        if indicator in text_lower:
+            return LANGUAGE_ID
+    if _PATTERNS_RE.search(text_lower):
+        return LANGUAGE_ID
+    return LANGUAGE_EN
+
+@lru_cache(maxsize=LANGUAGE_CACHE_SIZE)
+def detect_language_with_confidence(text: str) -> Tuple[str, float]:
+    """
+    Detect if text is in Indonesian or English, with the model's probability
+    for the returned language. Results are memoised per text.
+    """
+    if _model is None:
+        return detect_language_legacy(text), 1.0
+    language, confidence = _model.classify(text.lower())
+    if confidence < LANGUAGE_MIN_CONFIDENCE:
+        # Teks terlalu pendek/ambigu untuk model: pakai bahasa default
+        if language != LANGUAGE_DEFAULT:
+            return LANGUAGE_DEFAULT, 1 - confidence
+    return language, confidence
+
+def detect_language(text: str) -> str:
+    """
+    Detect if text is in Indonesian or English.
+    Returns 'id' for Indonesian, 'en' for English.
+    """
+    return detect_language_with_confidence(text)[0]
+
+def detector_status() -> dict:
+    """Active detector and memoisation counters for health output"""
+    info = detect_language_with_confidence.cache_info()
+    return {
+        "detector": "ngram" if _model is not None else "legacy",
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
@@ -0,0 +1,189 @@
+"""
+Client-side protection for the LLM providers (Gemini, Groq).
+- CircuitBreaker: per provider/model; opens on quota errors (429) or repeated
+  failures, lets one trial call through after a cool-down (half-open) and
+  closes again on success.
+- TokenBucket: per provider; keeps our request rate inside the quota so we
+  stop before the provider starts rejecting calls.
+"""
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Kegagalan berturut-turut (selain 429) sebelum breaker terbuka
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+# Lama breaker terbuka sebelum satu panggilan percobaan diizinkan (detik)
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+
+# Kuota permintaan per menit dan ukuran burst per provider
+PROVIDER_RATE_LIMITS = {
+    "gemini": (
+        float(os.getenv("GEMINI_RPM", "10")),
+        float(os.getenv("GEMINI_BURST", "3")),
+    ),
+    "groq": (
+        float(os.getenv("GROQ_RPM", "30")),
+        float(os.getenv("GROQ_BURST", "5")),
+    ),
+}
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._last_error = None
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._state = STATE_HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: hanya satu panggilan percobaan pada satu waktu
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def cancel(self):
+        """Give back a half-open trial slot that was granted but not used"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while the breaker is open and still cooling down (does not change state)"""
+        with self._lock:
+            return self._state == STATE_OPEN and time.monotonic() - self._opened_at < self.cooldown
+
+    def record_success(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self._last_error = None
+
+    def record_failure(self, error: str = None, quota_exceeded: bool = False):
+        """Count a failed call; quota errors open the breaker immediately"""
+        with self._lock:
+            self._failures += 1
+            self._last_error = (error or "")[:200] or None
+            if quota_exceeded or self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def status(self) -> dict:
+        with self._lock:
+            status = {
+                "state": self._state,
+                "failures": self._failures,
+                "last_error": self._last_error,
+            }
+            if self._state == STATE_OPEN:
+                status["retry_in"] = round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1)
+            return status
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = max(0.0, rate_per_minute) / 60
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if available, without waiting"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def refund(self, tokens: float = 1):
+        """Return tokens taken for a call that did not count against the provider's quota"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def available(self) -> bool:
+        """Whether a token could be taken right now (does not consume it)"""
+        with self._lock:
+            self._refill()
+            return self._tokens >= 1
+
+    def status(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {
+                "tokens": round(self._tokens, 2),
+                "capacity": self.capacity,
+                "rate_per_minute": self.rate * 60,
+            }
+
+_registry_lock = threading.Lock()
+_breakers = {}
+_buckets = {}
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Breaker for one provider/model pair"""
+    key = f"{provider}/{model}"
+    with _registry_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key)
+            _breakers[key] = breaker
+        return breaker
+
+def get_bucket(provider: str) -> TokenBucket:
+    """Rate limiter shared by all models of a provider"""
+    with _registry_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            rate, burst = PROVIDER_RATE_LIMITS.get(provider, (60.0, 10.0))
+            bucket = TokenBucket(rate, burst)
+            _buckets[provider] = bucket
+        return bucket
+
+def provider_exhausted(provider: str, models) -> bool:
+    """True when the provider is out of rate-limit tokens or every model's breaker is open"""
+    if not get_bucket(provider).available():
+        return True
+    return all(get_breaker(provider, model).is_open() for model in models)
+
+def is_quota_error(error_msg: str) -> bool:
+    lowered = error_msg.lower()
+    return '429' in error_msg or 'quota' in lowered or 'rate limit' in lowered
+
+def status() -> dict:
+    """Breaker and rate limiter state for health output"""
+    with _registry_lock:
+        breakers = dict(_breakers)
+        buckets = dict(_buckets)
+    return {
+        "breakers": {name: breaker.status() for name, breaker in sorted(breakers.items())},
+        "rate_limits": {provider: bucket.status() for provider, bucket in sorted(buckets.items())},
+    }
@@ -1,28 +1,131 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 
-from database import get_db, engine, Base
-from models import Review
-from schemas import ReviewCreate, ReviewResponse
-from sentiment_analyzer import analyze_sentiment
-from key_points_extractor import extract_key_points
+from database import (
+    get_session_runner, SessionRunner, engine, async_engine, Base, SessionLocal, upgrade_schema, missing_indexes, pool_status
+)
+from models import Review, AnalysisJob, TEXT_PREFIX_INDEX_LENGTH, text_prefix_expression
+from schemas import ReviewCreate, ReviewBatchCreate, ReviewResponse, ReviewPage, JobResponse, StatsResponse
+from sentiment_analyzer import (
+    analyze_sentiment, analyze_sentiment_batch, sentiment_batcher,
+    warmup_sentiment_model, model_status, is_model_ready, chunking_stats, ml_skip_stats,
+    sentiment_server_status,
+    SENTIMENT_PRELOAD, SENTIMENT_BACKEND, ANALYZER_VERSION
+)
+from key_points_extractor import (
+    extract_key_points_with_source, extract_key_points_batch, gemini_model_status, SOURCE_SIMPLE
+)
+from executor import run_blocking, run_blocking_timed, shutdown_executor
+import jobs
+import result_cache
+import llm_guard
+import language_detector
+import review_stats
+from pagination import encode_cursor, decode_cursor, created_at_bound, estimate_row_count, InvalidCursor
+from process_memory import memory_usage
 
 load_dotenv()
 
+# Batas jumlah review dalam satu permintaan batch
+MAX_BATCH_REVIEWS = int(os.getenv("MAX_BATCH_REVIEWS", "1000"))
+# Batas jumlah review per halaman /api/reviews
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
 # Buat tabel database (ditunda - hanya saat diperlukan)
 def init_database():
     """Initialize database tables"""
     try:
         Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
+        # Index pada tabel yang sudah ada dibuat oleh init_db.py, bukan di startup tiap worker
+        missing = missing_indexes(engine)
+        if missing:
+            print(f"⚠ Missing indexes {', '.join(index.name for index in missing)}, run: python init_db.py")
+        with SessionLocal() as db:
+            if review_stats.needs_rebuild(db):
+                print("⚠ Sentiment statistics are empty, run: python review_stats.py --rebuild")
         return True
     except Exception as e:
         print(f"Warning: Could not create database tables: {e}")
         return False
 
+def _save_review(db: Session, review_text: str, sentiment: str, key_points: str,
+                 cache_result: bool = False) -> ReviewResponse:
+    """Insert one analyzed review (and optionally its cache entry) and return the persisted row"""
+    db_review = Review(
+        review_text=review_text,
+        sentiment=sentiment,
+        key_points=key_points,
+        analysis_version=ANALYZER_VERSION
+    )
+    db.add(db_review)
+    if cache_result:
+        result_cache.store(db, review_text, sentiment, key_points)
+    # INSERT ... RETURNING mengisi id dan created_at saat flush; respons dibuat sebelum commit
+    # (commit meng-expire atribut), jadi tidak perlu SELECT tambahan lewat refresh
+    db.flush()
+    response = ReviewResponse.model_validate(db_review)
+    db.commit()
+    return response
+
+def _save_reviews(db: Session, review_texts: List[str], sentiments: List[str], key_points: List[str],
+                  cache_entries: Optional[Dict[str, Tuple[str, str]]] = None) -> List[ReviewResponse]:
+    """Insert a batch of analyzed reviews (plus new cache entries) in a single transaction"""
+    db_reviews = [
+        Review(review_text=text, sentiment=sentiment, key_points=points, analysis_version=ANALYZER_VERSION)
+        for text, sentiment, points in zip(review_texts, sentiments, key_points)
+    ]
+    db.add_all(db_reviews)
+    for text, (sentiment, points) in (cache_entries or {}).items():
+        result_cache.store(db, text, sentiment, points)
+    # flush mengambil id dan created_at lewat RETURNING, jadi tidak perlu refresh per baris
+    db.flush()
+    response = [ReviewResponse.model_validate(db_review) for db_review in db_reviews]
+    db.commit()
+    return response
+
+def _lookup_cached(db: Session, review_texts: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+    """Cached results for the texts; the read transaction is ended before the slow analysis stages"""
+    try:
+        return result_cache.lookup_many(db, review_texts)
+    finally:
+        # Kembalikan koneksi ke pool agar tidak ditahan selama inferensi model dan panggilan LLM
+        db.rollback()
+
+def _server_timing(timings: Dict[str, float]) -> str:
+    """Format per-stage durations (ms) as a Server-Timing header value"""
+    return ", ".join(f"{stage};dur={duration:.1f}" for stage, duration in timings.items())
+
+def _create_job(db: Session, review_text: str) -> JobResponse:
+    """Queue an analysis job and return its response while the session is still usable"""
+    return JobResponse.model_validate(jobs.create_job(db, review_text))
+
+def _get_job(db: Session, job_id: int) -> Optional[JobResponse]:
+    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+    return JobResponse.model_validate(job) if job else None
+
+def _get_review(db: Session, review_id: int) -> Optional[ReviewResponse]:
+    review = db.query(Review).filter(Review.id == review_id).first()
+    return ReviewResponse.model_validate(review) if review else None
+
+def _delete_review(db: Session, review_id: int) -> bool:
+    """Delete a review row and commit; False when it does not exist"""
+    review = db.query(Review).filter(Review.id == review_id).first()
+    if not review:
+        return False
+    db.delete(review)
+    db.commit()
+    return True
+
 app = FastAPI(title="Product Review Analyzer API", version="1.0.0")
 
 # Configure CORS
@@ -32,6 +135,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 @app.get("/")
@@ -39,12 +143,15 @@ def read_root():
     return {"message": "Product Review Analyzer API", "version": "1.0.0"}
 
 @app.post("/api/analyze-review", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
-async def analyze_review(review: ReviewCreate, db: Session = Depends(get_db)):
+async def analyze_review(review: ReviewCreate, response: Response, db: SessionRunner = Depends(get_session_runner)):
     """
     Analyze a product review:
     - Analyze sentiment (positive/negative/neutral) using Hugging Face
     - Extract key points using Gemini
     - Save to database
+    Sentiment and key points run concurrently; per-stage durations are
+    returned in the Server-Timing header. Repeated texts are served from
+    the result cache without touching the model or LLM.
     """
     try:
         # Validate input
@@ -54,42 +161,231 @@ async def analyze_review(review: ReviewCreate, db: Session = Depends(get_db)):
                 detail="Review text cannot be empty"
             )
         
-        # Analyze sentiment
-        sentiment = analyze_sentiment(review.review_text)
-        
-        # Extract key points
-        key_points = extract_key_points(review.review_text)
+        # Semua tahap blocking dijalankan di executor, bukan di event loop (model dan LLM di
+        # executor analisis, query DB di executor database)
+        # Sentimen dan poin utama tidak saling bergantung: jalankan bersamaan
+        analysis_start = time.perf_counter()
+        results, cache_ms = await db.run_timed(_lookup_cached, [review.review_text])
+        cached = results.get(review.review_text)
+        timings = {"cache": cache_ms}
+        if cached:
+            sentiment, key_points = cached
+            cache_result = False
+        else:
+            # Bahasa dideteksi sekali lalu diteruskan ke kedua tahap
+            language = language_detector.detect_language(review.review_text)
+            (sentiment, sentiment_ms), ((key_points, source), key_points_ms) = await asyncio.gather(
+                run_blocking_timed(analyze_sentiment, review.review_text, language),
+                run_blocking_timed(extract_key_points_with_source, review.review_text, language),
+            )
+            timings.update({"sentiment": sentiment_ms, "key_points": key_points_ms})
+            # Hasil ekstraksi sederhana (LLM tidak tersedia) tidak disimpan di cache
+            cache_result = source != SOURCE_SIMPLE
+        timings["analysis"] = (time.perf_counter() - analysis_start) * 1000
         
         # Save to database
-        db_review = Review(
-            review_text=review.review_text,
-            sentiment=sentiment,
-            key_points=key_points
+        db_review, timings["db"] = await db.run_timed(
+            _save_review, review.review_text, sentiment, key_points, cache_result
         )
-        db.add(db_review)
-        db.commit()
-        db.refresh(db_review)
         
+        response.headers["Server-Timing"] = _server_timing(timings)
         return db_review
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error analyzing review: {str(e)}"
         )
 
-@app.get("/api/reviews", response_model=List[ReviewResponse])
-async def get_reviews(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.post("/api/analyze-reviews", response_model=List[ReviewResponse], status_code=status.HTTP_201_CREATED)
+async def analyze_reviews(batch: ReviewBatchCreate, response: Response, db: SessionRunner = Depends(get_session_runner)):
+    """
+    Analyze many product reviews in one request:
+    - Analyze sentiment for all texts as batched model inference
+    - Extract key points for the whole set
+    - Save all rows in a single transaction
+    """
+    try:
+        # Validate input
+        if not batch.review_texts:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Review texts cannot be empty"
+            )
+        if len(batch.review_texts) > MAX_BATCH_REVIEWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A batch may contain at most {MAX_BATCH_REVIEWS} reviews"
+            )
+        for index, text in enumerate(batch.review_texts):
+            if not text or len(text.strip()) == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Review text at index {index} cannot be empty"
+                )
+        
+        # Sentimen dan poin utama untuk seluruh batch berjalan bersamaan
+        # Hanya teks yang belum ada di cache yang dianalisis
+        analysis_start = time.perf_counter()
+        results, cache_ms = await db.run_timed(_lookup_cached, batch.review_texts)
+        timings = {"cache": cache_ms}
+        misses = [text for text in dict.fromkeys(batch.review_texts) if text not in results]
+        cache_entries = {}
+        if misses:
+            (sentiments, sentiment_ms), (extracted, key_points_ms) = await asyncio.gather(
+                run_blocking_timed(analyze_sentiment_batch, misses),
+                run_blocking_timed(extract_key_points_batch, misses, with_source=True),
+            )
+            timings.update({"sentiment": sentiment_ms, "key_points": key_points_ms})
+            for text, sentiment, (points, source) in zip(misses, sentiments, extracted):
+                results[text] = (sentiment, points)
+                if source != SOURCE_SIMPLE:
+                    cache_entries[text] = (sentiment, points)
+        timings["analysis"] = (time.perf_counter() - analysis_start) * 1000
+        
+        sentiments = [results[text][0] for text in batch.review_texts]
+        key_points = [results[text][1] for text in batch.review_texts]
+        
+        # Save to database (satu transaksi untuk seluruh batch)
+        saved, timings["db"] = await db.run_timed(
+            _save_reviews, batch.review_texts, sentiments, key_points, cache_entries
+        )
+        
+        response.headers["Server-Timing"] = _server_timing(timings)
+        return saved
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error analyzing reviews: {str(e)}"
+        )
+
+@app.post("/api/analyze-review/async", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def analyze_review_async(review: ReviewCreate, response: Response, db: SessionRunner = Depends(get_session_runner)):
+    """
+    Queue a product review for analysis (job mode):
+    - Save immediately with the fast rule-based sentiment
+    - Worker pool fills in the ML sentiment and key points later
+    - Poll GET /api/jobs/{job_id} for the result
+    """
+    try:
+        # Validate input
+        if not review.review_text or len(review.review_text.strip()) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Review text cannot be empty"
+            )
+        
+        job = await db.run(_create_job, review.review_text)
+        response.headers["Location"] = f"/api/jobs/{job.id}"
+        return job
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error queuing review: {str(e)}"
+        )
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: SessionRunner = Depends(get_session_runner)):
     """
-    Get all reviews from the database.
-    Supports pagination with skip and limit parameters.
+    Get the status of an analysis job.
+    Status is one of queued, running, succeeded or failed.
     """
     try:
-        reviews = db.query(Review).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
-        return reviews
+        job = await db.run(_get_job, job_id)
+        
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job with id {job_id} not found"
+            )
+        
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching job: {str(e)}"
+        )
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _filter_reviews(query, sentiment: Optional[str], created_from: Optional[datetime],
+                    created_to: Optional[datetime], text_prefix: Optional[str]):
+    """Apply the /api/reviews filters; each one is answered from an index on Review"""
+    if sentiment:
+        query = query.filter(Review.sentiment == sentiment)
+    if created_from:
+        query = query.filter(Review.created_at >= created_from)
+    if created_to:
+        query = query.filter(Review.created_at < created_to)
+    if text_prefix:
+        prefix = text_prefix.lower()
+        # Ekspresi harus sama persis dengan index ix_reviews_text_prefix agar index dipakai
+        indexed_text = text_prefix_expression(Review.review_text)
+        query = query.filter(
+            indexed_text.like(_escape_like(prefix[:TEXT_PREFIX_INDEX_LENGTH]) + "%", escape="\\")
+        )
+        if len(prefix) > TEXT_PREFIX_INDEX_LENGTH:
+            # Sisa awalan yang lebih panjang dari index dicek pada baris hasil index
+            query = query.filter(func.lower(Review.review_text).like(_escape_like(prefix) + "%", escape="\\"))
+    return query
+
+def _fetch_review_page(db: Session, cursor: Optional[str], limit: int,
+                       sentiment: Optional[str] = None, created_from: Optional[datetime] = None,
+                       created_to: Optional[datetime] = None, text_prefix: Optional[str] = None) -> ReviewPage:
+    """One page of reviews, newest first, continued from `cursor` (keyset pagination)"""
+    filtered = any((sentiment, created_from, created_to, text_prefix))
+    query = _filter_reviews(db.query(Review), sentiment, created_from, created_to, text_prefix)
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        created_at = created_at_bound(db.get_bind().dialect, created_at)
+        # Baris setelah baris terakhir halaman sebelumnya, dibaca dari index (created_at, id)
+        query = query.filter(tuple_(Review.created_at, Review.id) < tuple_(created_at, review_id))
+    # Ambil satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+    rows = query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return ReviewPage(
+        items=items,
+        next_cursor=next_cursor,
+        # Perkiraan hanya berlaku untuk seluruh tabel, jadi tidak dikirim saat ada filter
+        estimated_total=None if filtered else estimate_row_count(db, Review.__table__)
+    )
+
+@app.get("/api/reviews", response_model=ReviewPage)
+async def get_reviews(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    sentiment: Optional[str] = Query(None, pattern="^(positive|negative|neutral)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    text_prefix: Optional[str] = Query(None, min_length=1, max_length=200),
+    db: SessionRunner = Depends(get_session_runner)
+):
+    """
+    Get reviews from the database, newest first.
+    Pass the `next_cursor` of a page as `cursor` to fetch the next one,
+    with the same filters.
+    """
+    try:
+        return await db.run(
+            _fetch_review_page, cursor, limit, sentiment, created_from, created_to, text_prefix
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -97,12 +393,12 @@ async def get_reviews(skip: int = 0, limit: int = 100, db: Session = Depends(get
         )
 
 @app.get("/api/reviews/{review_id}", response_model=ReviewResponse)
-async def get_review(review_id: int, db: Session = Depends(get_db)):
+async def get_review(review_id: int, db: SessionRunner = Depends(get_session_runner)):
     """
     Get a single review by ID.
     """
     try:
-        review = db.query(Review).filter(Review.id == review_id).first()
+        review = await db.run(_get_review, review_id)
         
         if not review:
             raise HTTPException(
@@ -120,24 +416,20 @@ async def get_review(review_id: int, db: Session = Depends(get_db)):
         )
 
 @app.delete("/api/reviews/{review_id}", status_code=status.HTTP_200_OK)
-async def delete_review(review_id: int, db: Session = Depends(get_db)):
+async def delete_review(review_id: int, db: SessionRunner = Depends(get_session_runner)):
     """
     Delete a review by ID.
     """
     try:
-        # Find the review
-        review = db.query(Review).filter(Review.id == review_id).first()
+        # Find and delete the review
+        deleted = await db.run(_delete_review, review_id)
         
-        if not review:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Review with id {review_id} not found"
             )
         
-        # Delete the review
-        db.delete(review)
-        db.commit()
-        
         return {
             "message": "Review deleted successfully",
             "id": review_id
@@ -146,7 +438,7 @@ async def delete_review(review_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting review: {str(e)}"
@@ -154,8 +446,39 @@ async def delete_review(review_id: int, db: Session = Depends(get_db)):
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
+    """Initialize database, start the analysis job workers and warm up the model on startup"""
     init_database()
+    jobs.start_workers()
+    if SENTIMENT_PRELOAD:
+        # Warmup berjalan di latar belakang; /api/ready mengembalikan 503 sampai selesai
+        app.state.warmup_task = asyncio.create_task(run_blocking(warmup_sentiment_model))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Wait for in-flight analyses and release executor and job worker threads"""
+    jobs.stop_workers()
+    shutdown_executor()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+@app.get("/api/stats", response_model=StatsResponse)
+async def get_stats(
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: SessionRunner = Depends(get_session_runner)
+):
+    """
+    Review counts per sentiment, overall and per hour/day bucket (UTC).
+    Served from summary tables kept up to date on every write.
+    """
+    try:
+        return await db.run(review_stats.get_stats, bucket, start, end)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching stats: {str(e)}"
+        )
 
 @app.get("/api/health")
 def health_check():
@@ -173,9 +496,31 @@ def health_check():
     return {
         "status": "healthy",
         "database": db_status,
+        "sentiment_backend": SENTIMENT_BACKEND,
+        "sentiment_batcher": sentiment_batcher.stats(),
+        "sentiment_chunking": chunking_stats(),
+        "sentiment_ml_skip": ml_skip_stats(),
+        "sentiment_server": sentiment_server_status(),
+        "result_cache": result_cache.stats(),
+        "db_pool": pool_status(),
+        "gemini": gemini_model_status(),
+        "llm_providers": llm_guard.status(),
+        "language_detector": language_detector.detector_status(),
+        "process": {"pid": os.getpid(), "memory": memory_usage()},
         "api_version": "1.0.0"
     }
 
+@app.get("/api/ready")
+def readiness_check():
+    """Readiness endpoint: 200 only once the sentiment model is loaded and warm"""
+    model = model_status()
+    if SENTIMENT_PRELOAD and not is_model_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not_ready", "model": model}
+        )
+    return {"status": "ready", "model": model}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
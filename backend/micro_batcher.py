@@ -0,0 +1,98 @@
+"""
+Dynamic micro-batching.
+Concurrent single-item calls are queued and coalesced into one call of a
+batch function, bounded by a maximum batch size and a maximum wait time.
+Every caller blocks until its own result (or exception) is ready.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+class MicroBatcher:
+    def __init__(self, process_batch: Callable[[List], List], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    def submit(self, item):
+        """Queue one item and wait for its result"""
+        return self.submit_async(item).result()
+
+    def submit_async(self, item) -> Future:
+        """Queue one item and return a Future for its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def stats(self) -> dict:
+        """Counters for observing how well calls are being coalesced"""
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+            "largest_batch": self._largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> list:
+        """Block for the first item, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Waktu tunggu habis: ambil saja yang sudah mengantre tanpa menunggu lagi
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            self._batches += 1
+            self._items += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            try:
+                results = self.process_batch(items)
+            except Exception as e:
+                if len(batch) == 1:
+                    futures[0].set_exception(e)
+                else:
+                    # Satu item bermasalah jangan menggagalkan pemanggil lain: ulangi per item
+                    self._process_individually(items, futures)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def _process_individually(self, items: list, futures: List[Future]):
+        for item, future in zip(items, futures):
+            try:
+                future.set_result(self.process_batch([item])[0])
+            except Exception as e:
+                future.set_exception(e)
@@ -1,7 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Index, literal_column
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
+# Jumlah karakter awal review_text yang masuk index pencarian awalan teks
+# (teks penuh bisa melebihi batas ukuran entri btree)
+TEXT_PREFIX_INDEX_LENGTH = 64
+
+def text_prefix_expression(review_text):
+    """lower(substr(review_text, 1, TEXT_PREFIX_INDEX_LENGTH)), the expression of ix_reviews_text_prefix"""
+    # Batas substr ditulis sebagai literal, bukan parameter terikat: dengan asyncpg parameter
+    # dikirim sebagai $n sehingga ekspresi query tidak lagi cocok dengan index ekspresi
+    return func.lower(func.substr(
+        review_text, literal_column("1"), literal_column(str(TEXT_PREFIX_INDEX_LENGTH))
+    ))
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -10,4 +23,55 @@ class Review(Base):
     sentiment = Column(String(20), nullable=False)  # positive, negative, neutral
     key_points = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    analysis_version = Column(String(20), nullable=True)  # ANALYZER_VERSION saat sentimen dihitung
+
+    # id dan created_at (default server) dibaca lewat INSERT ... RETURNING saat flush, tanpa SELECT terpisah
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Pagination keyset: ORDER BY created_at DESC, id DESC dibaca langsung dari index ini
+        # (juga dipakai untuk filter rentang created_at)
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        # Filter sentimen + urutan keyset dalam satu index scan
+        Index("ix_reviews_sentiment_created_at_id", "sentiment", "created_at", "id"),
+        # Pencarian awalan teks tanpa membedakan huruf besar/kecil (LIKE 'awalan%')
+        Index(
+            "ix_reviews_text_prefix",
+            text_prefix_expression(review_text).label("text_prefix"),
+            postgresql_ops={"text_prefix": "text_pattern_ops"},
+        ),
+    )
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=True, index=True)
+    status = Column(String(20), nullable=False, index=True)  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    review = relationship("Review")
+
+class AnalysisCache(Base):
+    __tablename__ = "analysis_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 teks ternormalisasi + versi
+    sentiment = Column(String(20), nullable=False)
+    key_points = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SentimentHourlyCount(Base):
+    __tablename__ = "sentiment_hourly_counts"
+
+    hour = Column(DateTime, primary_key=True)  # awal jam (UTC) dari created_at
+    sentiment = Column(String(20), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+class SentimentTotal(Base):
+    __tablename__ = "sentiment_totals"
 
+    sentiment = Column(String(20), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
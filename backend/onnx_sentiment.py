@@ -0,0 +1,85 @@
+"""
+ONNX Runtime inference for the sentiment model.
+OnnxSentimentPipeline mirrors the call signature and output of the
+transformers "sentiment-analysis" pipeline, so it can be returned from
+get_sentiment_analyzer() in place of the torch pipeline.
+Artifacts are produced once by export_onnx_model.py.
+"""
+import json
+import os
+from typing import List, Union
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model-int8.onnx"
+# Sama dengan batas posisi model roberta
+MAX_SEQUENCE_LENGTH = 512
+
+class OnnxSentimentPipeline:
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = 0):
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found, run: python export_onnx_model.py --output {model_dir}"
+            )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        # Label diambil dari config model yang diekspor, sama seperti pipeline torch
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+        self.id2label = {int(index): label for index, label in config["id2label"].items()}
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.model_file = model_file
+
+    def __call__(self, inputs: Union[str, List[str]], batch_size: int = None, top_k="", **kwargs) -> List:
+        """
+        Return [{'label', 'score'}] per text, like the transformers pipeline.
+        With top_k=None every label is returned per text, sorted by score.
+        """
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        if not texts:
+            return []
+        batch_size = batch_size or len(texts)
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self._predict(texts[start:start + batch_size], all_scores=top_k is None))
+        return results
+
+    def _predict(self, texts: List[str], all_scores: bool = False) -> List:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQUENCE_LENGTH,
+            return_tensors="np",
+        )
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        logits = self.session.run(None, feed)[0]
+        # Softmax, sama dengan function_to_apply default pipeline untuk klasifikasi multi-kelas
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        if all_scores:
+            return [
+                sorted(
+                    ({"label": self.id2label[index], "score": float(score)} for index, score in enumerate(row)),
+                    key=lambda result: result["score"],
+                    reverse=True
+                )
+                for row in probabilities
+            ]
+        best = probabilities.argmax(axis=-1)
+        return [
+            {"label": self.id2label[int(index)], "score": float(row[index])}
+            for row, index in zip(probabilities, best)
+        ]
@@ -0,0 +1,61 @@
+"""
+Keyset pagination helpers for /api/reviews.
+A page is continued from the (created_at, id) of its last row instead of
+an OFFSET, so every page is one index range scan regardless of depth.
+The cursor is that pair encoded as URL-safe base64 JSON; clients treat it
+as opaque.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import String, func, literal, select, text
+
+class InvalidCursor(ValueError):
+    """The cursor was not produced by encode_cursor()"""
+
+def encode_cursor(created_at: datetime, review_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), review_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, review_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(review_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def created_at_bound(dialect, created_at: datetime):
+    """
+    The cursor's created_at as the value to compare Review.created_at with.
+    SQLite stores DATETIME as text: rows from the CURRENT_TIMESTAMP default
+    have no fraction ("2024-01-01 10:00:00"), while a bound datetime is
+    rendered with microseconds and sorts after every row of that second, so
+    the next page would start over. There the bound is written in the
+    stored form instead.
+    """
+    if dialect.name != "sqlite":
+        return created_at
+    stored_format = "%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond else "%Y-%m-%d %H:%M:%S"
+    return literal(created_at.strftime(stored_format), String)
+
+def estimate_row_count(db, table) -> Optional[int]:
+    """
+    Approximate row count without scanning the table. On PostgreSQL this is
+    pg_class.reltuples, kept up to date by ANALYZE/autovacuum; None when the
+    table has never been analysed. Other databases (local SQLite) fall back
+    to COUNT(*).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return db.execute(select(func.count()).select_from(table)).scalar()
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table.name}
+    ).scalar()
+    # reltuples bernilai -1 jika tabel belum pernah di-ANALYZE
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
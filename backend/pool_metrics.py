@@ -0,0 +1,83 @@
+"""
+Connection pool instrumentation.
+instrumented_pool() wraps a SQLAlchemy queue pool class so every checkout
+records how long the caller waited for a connection (including opening a
+new overflow connection) and whether it timed out. Together with the pool's
+own counters this shows whether pool_size/max_overflow fit the real load.
+"""
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+
+# Jumlah waktu tunggu terakhir yang disimpan untuk menghitung persentil
+RECENT_WAITS = 1024
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent = deque(maxlen=RECENT_WAITS)
+        self.pool = None
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self._timeouts += 1
+                return
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._recent.append(wait)
+
+    def snapshot(self) -> dict:
+        """Checkout wait times plus current pool occupancy"""
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts = self._checkouts
+            stats = {
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait / checkouts * 1000, 3) if checkouts else 0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "p50_wait_ms": round(recent[len(recent) // 2] * 1000, 3) if recent else 0,
+                "p99_wait_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 3) if recent else 0,
+            }
+        pool = self.pool
+        if pool is not None:
+            capacity = pool.size() + max(0, pool._max_overflow)
+            checked_out = pool.checkedout()
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": checked_out,
+                "overflow": max(0, pool.overflow()),
+                "utilisation": round(checked_out / capacity, 3) if capacity else 0,
+            })
+        return stats
+
+def instrumented_pool(pool_class, metrics: PoolMetrics):
+    """Subclass of `pool_class` that reports every checkout to `metrics`"""
+    class InstrumentedPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Pool dibuat ulang (recreate) dengan kelas yang sama, jadi metrik tetap terhubung
+            metrics.pool = self
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
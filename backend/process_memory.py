@@ -0,0 +1,50 @@
+"""
+Per-process memory figures from /proc (Linux only).
+RSS counts every resident page, including pages shared with other
+processes; PSS divides each shared page by the number of processes
+mapping it, so the PSS of all workers adds up to their real footprint.
+Used to check how much of the model is shared between forked workers.
+"""
+import os
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+def memory_usage(pid="self"):
+    """Memory of one process in MB, or None when /proc is not available"""
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        return None
+    usage = {}
+    with open(path) as f:
+        for line in f:
+            field, _, value = line.partition(":")
+            if field in _SMAPS_FIELDS:
+                # Nilai dalam kB
+                usage[_SMAPS_FIELDS[field]] = round(int(value.split()[0]) / 1024, 1)
+    usage["shared_mb"] = round(usage.get("shared_clean_mb", 0) + usage.get("shared_dirty_mb", 0), 1)
+    usage["private_mb"] = round(usage.get("private_clean_mb", 0) + usage.get("private_dirty_mb", 0), 1)
+    return usage
+
+def format_memory_report(pids: dict) -> str:
+    """Table of RSS/PSS/shared/private memory for {name: pid}"""
+    lines = [f"{'process':<12}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}"]
+    total_pss = 0.0
+    for name, pid in pids.items():
+        usage = memory_usage(pid)
+        if usage is None:
+            lines.append(f"{name:<12}{pid:>8}  (unavailable)")
+            continue
+        total_pss += usage.get("pss_mb", 0)
+        lines.append(
+            f"{name:<12}{pid:>8}{usage.get('rss_mb', 0):>10.1f}{usage.get('pss_mb', 0):>10.1f}"
+            f"{usage['shared_mb']:>11.1f}{usage['private_mb']:>12.1f}"
+        )
+    lines.append(f"{'total PSS':<20}{total_pss:>20.1f}")
+    return "\n".join(lines)
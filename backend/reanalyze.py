@@ -0,0 +1,206 @@
+"""
+Re-run the analysis over reviews already stored in the database.
+Use after changing the sentiment model or rules (ANALYZER_VERSION): only
+rows whose analysis_version differs from the current ANALYZER_VERSION are
+processed. Rows are streamed in id order with a server-side cursor, analysed
+by a pool of worker processes and written back with batched UPDATEs.
+Progress is checkpointed after every batch, so an interrupted run resumes
+where it stopped.
+
+Run:   python reanalyze.py [--workers 4] [--key-points] [--all]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, func, or_, select, update
+
+load_dotenv()
+
+from database import engine, upgrade_schema
+from models import Review
+from review_stats import apply_deltas, hour_bucket
+from sentiment_analyzer import ANALYZER_VERSION
+
+# Jumlah baris per tugas worker dan per UPDATE
+REANALYZE_BATCH_SIZE = int(os.getenv("REANALYZE_BATCH_SIZE", "256"))
+REANALYZE_WORKERS = int(os.getenv("REANALYZE_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+DEFAULT_CHECKPOINT = "reanalyze.checkpoint.json"
+
+reviews = Review.__table__
+
+def _init_worker(threads: int):
+    import sentiment_analyzer
+    # Core dibagi rata antar proses worker
+    sentiment_analyzer.set_inference_threads(threads)
+
+def _analyze_rows(rows, with_key_points: bool):
+    """Worker process: analysis results for [(id, text)] as [(id, sentiment, key_points)]"""
+    from sentiment_analyzer import analyze_sentiment_batch
+    texts = [text for _, text in rows]
+    sentiments = analyze_sentiment_batch(texts)
+    if not with_key_points:
+        return [(review_id, sentiment, None) for (review_id, _), sentiment in zip(rows, sentiments)]
+    from key_points_extractor import extract_key_points
+    from language_detector import detect_language
+    return [
+        (review_id, sentiment, extract_key_points(text, detect_language(text)))
+        for (review_id, text), sentiment in zip(rows, sentiments)
+    ]
+
+def _stale_rows_query(after_id: int, reprocess_all: bool):
+    query = select(reviews.c.id, reviews.c.review_text).where(reviews.c.id > after_id)
+    if not reprocess_all:
+        query = query.where(or_(
+            reviews.c.analysis_version.is_(None),
+            reviews.c.analysis_version != ANALYZER_VERSION
+        ))
+    return query.order_by(reviews.c.id)
+
+def _write_results(results, with_key_points: bool) -> int:
+    """Write one batch of results in a single transaction with an executemany UPDATE"""
+    values = {"sentiment": bindparam("new_sentiment"), "analysis_version": bindparam("new_version")}
+    if with_key_points:
+        values["key_points"] = bindparam("new_key_points")
+    statement = update(reviews).where(reviews.c.id == bindparam("review_id")).values(**values)
+    params = [
+        {"review_id": review_id, "new_sentiment": sentiment,
+         "new_key_points": key_points, "new_version": ANALYZER_VERSION}
+        for review_id, sentiment, key_points in results
+    ]
+    with engine.begin() as conn:
+        # UPDATE inti tidak melewati event sesi ORM, jadi statistik sentimen disesuaikan di sini
+        old_rows = conn.execute(
+            select(reviews.c.id, reviews.c.sentiment, reviews.c.created_at)
+            .where(reviews.c.id.in_([review_id for review_id, _, _ in results]))
+        )
+        new_sentiments = {review_id: sentiment for review_id, sentiment, _ in results}
+        deltas = Counter()
+        for review_id, old_sentiment, created_at in old_rows:
+            if old_sentiment != new_sentiments[review_id]:
+                deltas[(hour_bucket(created_at), old_sentiment)] -= 1
+                deltas[(hour_bucket(created_at), new_sentiments[review_id])] += 1
+        conn.execute(statement, params)
+        apply_deltas(conn, deltas)
+    return len(params)
+
+class Checkpoint:
+    """Last fully written review id, stored as JSON next to the run options it belongs to"""
+    def __init__(self, path: str, options: dict):
+        self.path = path
+        self.options = options
+        self.last_id = 0
+        self.processed = 0
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        # Checkpoint dari run dengan versi atau opsi lain tidak dipakai
+        if state.get("options") != self.options:
+            print(f"⚠ Ignoring checkpoint {self.path}: it was written with {state.get('options')}")
+            return False
+        self.last_id = state["last_id"]
+        self.processed = state["processed"]
+        return True
+
+    def save(self, last_id: int, processed: int):
+        self.last_id = last_id
+        self.processed = processed
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"options": self.options, "last_id": last_id, "processed": processed}, f)
+        # Ganti secara atomik agar checkpoint tidak pernah setengah tertulis
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def reanalyze(workers: int = REANALYZE_WORKERS, batch_size: int = REANALYZE_BATCH_SIZE,
+              with_key_points: bool = False, reprocess_all: bool = False,
+              checkpoint_path: str = DEFAULT_CHECKPOINT, restart: bool = False) -> int:
+    """Re-analyse stale reviews and return how many rows were updated in this run"""
+    upgrade_schema(engine)
+    checkpoint = Checkpoint(checkpoint_path, {
+        "analyzer_version": ANALYZER_VERSION,
+        "key_points": with_key_points,
+        "all": reprocess_all,
+    })
+    if restart:
+        checkpoint.clear()
+    elif checkpoint.load():
+        print(f"Resuming after review id {checkpoint.last_id} ({checkpoint.processed} already done)")
+
+    with engine.connect() as conn:
+        total = conn.execute(
+            select(func.count()).select_from(_stale_rows_query(checkpoint.last_id, reprocess_all).subquery())
+        ).scalar()
+    print(f"{total} review(s) to re-analyze with ANALYZER_VERSION {ANALYZER_VERSION} "
+          f"({workers} worker(s), {batch_size} rows per batch)")
+    if not total:
+        checkpoint.clear()
+        return 0
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn: worker tidak mewarisi koneksi database proses induk
+    context = multiprocessing.get_context("spawn")
+    updated = 0
+    already_processed = checkpoint.processed
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads,)) as pool, \
+            engine.connect() as conn:
+        # Cursor sisi server: baris diambil per `batch_size`, tidak dimuat semua ke memori
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            _stale_rows_query(checkpoint.last_id, reprocess_all)
+        )
+        pending = deque()
+
+        def write_oldest():
+            nonlocal updated
+            last_id, future = pending.popleft()
+            updated += _write_results(future.result(), with_key_points)
+            # Batch ditulis sesuai urutan id, jadi semua id <= last_id sudah selesai
+            checkpoint.save(last_id, already_processed + updated)
+            rate = updated / (time.perf_counter() - start)
+            print(f"  {updated}/{total} updated ({rate:.1f} rows/s)", flush=True)
+
+        for partition in result.partitions():
+            rows = [(review_id, text) for review_id, text in partition]
+            pending.append((rows[-1][0], pool.submit(_analyze_rows, rows, with_key_points)))
+            # Batasi batch yang sedang diproses agar memori tetap kecil
+            while len(pending) >= workers * 2:
+                write_oldest()
+        while pending:
+            write_oldest()
+
+    checkpoint.clear()
+    print(f"✓ Re-analyzed {updated} review(s) in {time.perf_counter() - start:.1f}s")
+    return updated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze stored reviews whose analysis is out of date")
+    parser.add_argument("--workers", type=int, default=REANALYZE_WORKERS, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=REANALYZE_BATCH_SIZE, help="Rows per task and per UPDATE")
+    parser.add_argument("--key-points", action="store_true", help="Also re-extract key points (calls Gemini/Groq)")
+    parser.add_argument("--all", action="store_true", help="Re-analyze every review, not only stale ones")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file used to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args()
+    try:
+        reanalyze(
+            workers=max(1, args.workers),
+            batch_size=max(1, args.batch_size),
+            with_key_points=args.key_points,
+            reprocess_all=args.all,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+        )
+    except KeyboardInterrupt:
+        print("\nInterrupted, run again to resume from the checkpoint")
@@ -0,0 +1,143 @@
+"""
+Content-hash cache for analysis results.
+Repeated review texts are served from an in-process LRU tier, backed by the
+analysis_cache table, without running the model or calling an LLM.
+Keys combine the normalised text with ANALYZER_VERSION and PROMPT_VERSION,
+so bumping either version invalidates old entries.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import AnalysisCache
+from sentiment_analyzer import ANALYZER_VERSION
+from key_points_extractor import PROMPT_VERSION
+
+load_dotenv()
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Batas ukuran tier memori (perkiraan byte teks yang disimpan)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_bytes = 0
+_counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "evictions": 0}
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivial variations share an entry"""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def cache_key(text: str) -> str:
+    """Cache key for a review text under the current analyzer and prompt versions"""
+    raw = f"{ANALYZER_VERSION}:{PROMPT_VERSION}:{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _count(counter: str, amount: int = 1):
+    with _lock:
+        _counters[counter] += amount
+
+def _entry_size(key: str, sentiment: str, key_points: Optional[str]) -> int:
+    return len(key) + len(sentiment) + len(key_points or "") + 64
+
+def _memory_get(key: str) -> Optional[Tuple[str, Optional[str]]]:
+    with _lock:
+        value = _entries.get(key)
+        if value is not None:
+            _entries.move_to_end(key)
+        return value
+
+def _memory_put(key: str, sentiment: str, key_points: Optional[str]):
+    global _bytes
+    size = _entry_size(key, sentiment, key_points)
+    if size > RESULT_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        if key in _entries:
+            old_sentiment, old_key_points = _entries.pop(key)
+            _bytes -= _entry_size(key, old_sentiment, old_key_points)
+        _entries[key] = (sentiment, key_points)
+        _bytes += size
+        # Buang entri yang paling lama tidak dipakai sampai ukuran kembali di bawah batas
+        while _bytes > RESULT_CACHE_MAX_BYTES and _entries:
+            old_key, (old_sentiment, old_key_points) = _entries.popitem(last=False)
+            _bytes -= _entry_size(old_key, old_sentiment, old_key_points)
+            _counters["evictions"] += 1
+
+def lookup_many(db, texts: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+    """
+    Return cached (sentiment, key_points) for every text that has an entry.
+    Memory is checked first; remaining keys are fetched from the table in one query.
+    """
+    if not RESULT_CACHE_ENABLED or not texts:
+        return {}
+
+    found = {}
+    missing = {}
+    for text in dict.fromkeys(texts):
+        key = cache_key(text)
+        value = _memory_get(key)
+        if value is not None:
+            found[text] = value
+            _count("memory_hits")
+        else:
+            missing.setdefault(key, []).append(text)
+
+    if missing:
+        try:
+            rows = db.query(AnalysisCache).filter(AnalysisCache.cache_key.in_(list(missing))).all()
+        except Exception as e:
+            print(f"Warning: Result cache lookup failed: {e}")
+            rows = []
+        for row in rows:
+            _memory_put(row.cache_key, row.sentiment, row.key_points)
+            for text in missing.pop(row.cache_key):
+                found[text] = (row.sentiment, row.key_points)
+                _count("db_hits")
+        _count("misses", sum(len(group) for group in missing.values()))
+
+    return found
+
+def lookup(db, text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Cached (sentiment, key_points) for one text, or None"""
+    return lookup_many(db, [text]).get(text)
+
+def store(db, text: str, sentiment: str, key_points: Optional[str]):
+    """
+    Remember a result in memory and stage it in the table.
+    The caller commits, so the entry is written in the same transaction as the review.
+    """
+    if not RESULT_CACHE_ENABLED:
+        return
+    key = cache_key(text)
+    _memory_put(key, sentiment, key_points)
+    if db.get_bind().dialect.name == "postgresql":
+        # Dua request bersamaan dengan teks yang sama tidak boleh menggagalkan insert review
+        db.execute(
+            pg_insert(AnalysisCache)
+            .values(cache_key=key, sentiment=sentiment, key_points=key_points)
+            .on_conflict_do_nothing(index_elements=["cache_key"])
+        )
+    else:
+        db.merge(AnalysisCache(cache_key=key, sentiment=sentiment, key_points=key_points))
+
+def stats() -> dict:
+    """Hit/miss counters and memory-tier size"""
+    with _lock:
+        counters = dict(_counters)
+        entries = len(_entries)
+        size = _bytes
+    hits = counters["memory_hits"] + counters["db_hits"]
+    total = hits + counters["misses"]
+    return {
+        **counters,
+        "hit_rate": round(hits / total, 3) if total else 0,
+        "entries": entries,
+        "bytes": size,
+        "max_bytes": RESULT_CACHE_MAX_BYTES,
+    }
@@ -0,0 +1,181 @@
+"""
+Sentiment counts per hour and in total, kept in summary tables.
+Every insert, sentiment change and delete of a Review made through an
+AppSession (SessionLocal or AsyncSessionLocal) adjusts the counters in the
+same transaction, so /api/stats reads a few summary rows instead of scanning reviews.
+rebuild() recomputes both tables from the reviews table.
+
+Run:   python review_stats.py --rebuild
+"""
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import AppSession, engine
+from models import Review, SentimentHourlyCount, SentimentTotal
+
+SENTIMENTS = ("positive", "negative", "neutral")
+BUCKETS = ("hour", "day")
+# Rentang default /api/stats bila start tidak diberikan
+DEFAULT_RANGE = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+
+def to_utc_naive(value: Optional[datetime]) -> datetime:
+    """Timestamp as a naive UTC datetime (naive input is taken to be UTC already)"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def hour_bucket(created_at: Optional[datetime]) -> datetime:
+    """Start of the UTC hour a review belongs to"""
+    return to_utc_naive(created_at).replace(minute=0, second=0, microsecond=0)
+
+def bucket_start(value: datetime, bucket: str) -> datetime:
+    """Start of the UTC hour or day (bucket) that value falls in"""
+    start = hour_bucket(value)
+    return start if bucket == "hour" else start.replace(hour=0)
+
+def _insert_for(dialect_name: str):
+    # INSERT ... ON CONFLICT DO UPDATE tersedia di PostgreSQL dan SQLite
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Sentiment statistics are not supported on {dialect_name}")
+
+def apply_deltas(connection, deltas: Dict[tuple, int]):
+    """Add {(hour, sentiment): change} to the hourly and total counters in the caller's transaction"""
+    deltas = {key: change for key, change in deltas.items() if change}
+    if not deltas:
+        return
+    upsert = _insert_for(connection.dialect.name)
+    totals = Counter()
+    for (_, sentiment), change in deltas.items():
+        totals[sentiment] += change
+
+    # Kunci diurutkan agar transaksi yang berjalan bersamaan mengunci baris dalam urutan yang sama
+    statement = upsert(SentimentHourlyCount).values([
+        {"hour": hour, "sentiment": sentiment, "count": change}
+        for (hour, sentiment), change in sorted(deltas.items())
+    ])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["hour", "sentiment"],
+        set_={"count": SentimentHourlyCount.count + statement.excluded["count"]}
+    ))
+    statement = upsert(SentimentTotal).values([
+        {"sentiment": sentiment, "count": change}
+        for sentiment, change in sorted(totals.items()) if change
+    ])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["sentiment"],
+        set_={"count": SentimentTotal.count + statement.excluded["count"]}
+    ))
+
+@event.listens_for(AppSession, "before_flush")
+def _track_review_changes(session, flush_context, instances):
+    """Turn the pending Review sentiment updates and deletes into counter deltas"""
+    deltas = Counter()
+    for obj in session.deleted:
+        if isinstance(obj, Review):
+            deltas[(hour_bucket(obj.created_at), obj.sentiment)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Review) and obj not in session.deleted:
+            history = inspect(obj).attrs.sentiment.history
+            if history.deleted and history.added and history.deleted[0] != history.added[0]:
+                bucket = hour_bucket(obj.created_at)
+                deltas[(bucket, history.deleted[0])] -= 1
+                deltas[(bucket, history.added[0])] += 1
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
+
+@event.listens_for(AppSession, "after_flush")
+def _track_review_inserts(session, flush_context):
+    """Count the Review rows inserted by this flush"""
+    # created_at baru terisi now() dari database setelah INSERT ... RETURNING (eager_defaults),
+    # jadi bucket-nya sama dengan yang dihitung rebuild(); session.new masih berisi baris tersebut
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Review):
+            deltas[(hour_bucket(obj.created_at), obj.sentiment)] += 1
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def get_stats(db, bucket: str = "day", start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    """
+    Totals per sentiment plus per-bucket counts for [start, end), all from
+    the summary tables. start is moved back to the start of its hour or day,
+    and the returned start is that aligned bound.
+    """
+    end = to_utc_naive(end)
+    # Awal rentang diratakan ke awal jam/hari agar bucket pertama berisi seluruh jam/harinya
+    start = bucket_start(to_utc_naive(start) if start else end - DEFAULT_RANGE[bucket], bucket)
+    total = {sentiment: 0 for sentiment in SENTIMENTS}
+    for sentiment, count in db.execute(select(SentimentTotal.sentiment, SentimentTotal.count)):
+        total[sentiment] = int(count)
+
+    # Jumlah baris yang dibaca bergantung pada rentang waktu, bukan ukuran tabel reviews
+    hourly = db.execute(
+        select(SentimentHourlyCount.hour, SentimentHourlyCount.sentiment, SentimentHourlyCount.count)
+        .where(SentimentHourlyCount.hour >= start, SentimentHourlyCount.hour < end)
+        .order_by(SentimentHourlyCount.hour)
+    )
+    buckets = {}
+    for hour, sentiment, count in hourly:
+        key = bucket_start(hour, bucket)
+        counts = buckets.setdefault(key, {name: 0 for name in SENTIMENTS})
+        counts[sentiment] = counts.get(sentiment, 0) + int(count)
+    return {
+        "total": total,
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "buckets": [{"start": key, "counts": counts} for key, counts in buckets.items()],
+    }
+
+def needs_rebuild(db) -> bool:
+    """True when reviews exist but the summary tables were never filled (e.g. right after upgrading)"""
+    has_totals = db.execute(select(SentimentTotal.sentiment).limit(1)).first() is not None
+    return not has_totals and db.execute(select(Review.id).limit(1)).first() is not None
+
+def rebuild(bind=engine):
+    """Recompute both summary tables from the reviews table in one transaction"""
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Tahan penulisan ke reviews selama penghitungan ulang agar hasilnya konsisten
+            conn.exec_driver_sql("LOCK TABLE reviews IN SHARE MODE")
+            hour = func.date_trunc("hour", func.timezone("UTC", Review.created_at))
+        else:
+            # Format penyimpanan DateTime SQLAlchemy di SQLite
+            hour = func.strftime("%Y-%m-%d %H:00:00.000000", Review.created_at)
+        conn.execute(delete(SentimentHourlyCount))
+        conn.execute(delete(SentimentTotal))
+        conn.execute(insert(SentimentHourlyCount).from_select(
+            ["hour", "sentiment", "count"],
+            select(hour, Review.sentiment, func.count())
+            .where(Review.created_at.isnot(None))
+            .group_by(hour, Review.sentiment)
+        ))
+        conn.execute(insert(SentimentTotal).from_select(
+            ["sentiment", "count"],
+            select(SentimentHourlyCount.sentiment, func.sum(SentimentHourlyCount.count))
+            .group_by(SentimentHourlyCount.sentiment)
+        ))
+        total = conn.execute(select(func.sum(SentimentTotal.count))).scalar() or 0
+    print(f"✓ Sentiment statistics rebuilt from {total} review(s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the sentiment statistics summary tables")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the summary tables from reviews")
+    args = parser.parse_args()
+    if args.rebuild:
+        from database import Base, upgrade_schema
+        Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
+        rebuild()
+    else:
+        parser.print_help()
@@ -1,10 +1,13 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class ReviewCreate(BaseModel):
     review_text: str
 
+class ReviewBatchCreate(BaseModel):
+    review_texts: List[str]
+
 class ReviewResponse(BaseModel):
     id: int
     review_text: str
@@ -15,3 +18,31 @@ class ReviewResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ReviewPage(BaseModel):
+    items: List[ReviewResponse]
+    next_cursor: Optional[str]  # None pada halaman terakhir
+    estimated_total: Optional[int]  # Perkiraan jumlah baris seluruh tabel (bukan COUNT(*)); None jika ada filter
+
+class StatsBucket(BaseModel):
+    start: datetime  # awal jam/hari (UTC)
+    counts: Dict[str, int]
+
+class StatsResponse(BaseModel):
+    total: Dict[str, int]
+    bucket: str  # "hour" atau "day"
+    start: datetime
+    end: datetime
+    buckets: List[StatsBucket]
+
+class JobResponse(BaseModel):
+    id: int
+    review_id: Optional[int]
+    status: str
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    review: Optional[ReviewResponse] = None
+
+    class Config:
+        from_attributes = True
@@ -1,252 +1,323 @@
-from transformers import pipeline
-import torch
+import os
 import re
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from micro_batcher import MicroBatcher
+from inference_client import InferenceClient
+import sentiment_lexicon
+import bulk_scorer
+from language_detector import detect_language
 
 # Inisialisasi pipeline analisis sentimen
 # Menggunakan model ringan untuk kinerja lebih baik
 sentiment_pipeline = None
+_pipeline_lock = threading.Lock()
+_model_ready = threading.Event()
+_model_error = None
+
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+# Naikkan setiap kali model atau aturan berubah (bagian dari kunci cache hasil)
+ANALYZER_VERSION = "4"
+# Direktori model lokal yang di-pin (lihat download_model.py); jika diisi, tidak ada lookup ke Hub
+SENTIMENT_MODEL_PATH = os.getenv("SENTIMENT_MODEL_PATH")
+# Muat dan warmup model saat startup (bukan saat request pertama)
+SENTIMENT_PRELOAD = os.getenv("SENTIMENT_PRELOAD", "true").lower() in ("1", "true", "yes")
+# Jumlah inferensi dummy saat warmup
+SENTIMENT_WARMUP_RUNS = int(os.getenv("SENTIMENT_WARMUP_RUNS", "3"))
+
+# Backend inferensi: 'torch' (pipeline transformers), 'onnx' atau 'onnx-int8' (ONNX Runtime)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch").lower()
+# Direktori hasil export_onnx_model.py
+SENTIMENT_ONNX_PATH = os.getenv("SENTIMENT_ONNX_PATH", "model_cache/twitter-roberta-base-sentiment-latest-onnx")
+# Jumlah thread ONNX Runtime per sesi (0 = default ONNX Runtime)
+SENTIMENT_ONNX_THREADS = int(os.getenv("SENTIMENT_ONNX_THREADS", "0"))
+SENTIMENT_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Review yang lebih panjang dari batas model (512 token termasuk token khusus) dipecah menjadi
+# jendela token yang saling tumpang tindih; hasil per jendela digabung menjadi satu label
+SENTIMENT_WINDOW_TOKENS = int(os.getenv("SENTIMENT_WINDOW_TOKENS", "500"))
+SENTIMENT_WINDOW_OVERLAP = int(os.getenv("SENTIMENT_WINDOW_OVERLAP", "64"))
+
+# Jika diisi, inferensi dikirim ke inference_server.py lewat Unix socket ini dan worker API tidak memuat model
+SENTIMENT_SERVER_SOCKET = os.getenv("SENTIMENT_SERVER_SOCKET") or None
+SENTIMENT_SERVER_TIMEOUT = float(os.getenv("SENTIMENT_SERVER_TIMEOUT", "30"))
+_inference_client = InferenceClient(SENTIMENT_SERVER_SOCKET, SENTIMENT_SERVER_TIMEOUT) if SENTIMENT_SERVER_SOCKET else None
+
+# Untuk Bahasa Indonesia hasil akhir selalu mengikuti aturan; jika selisih skor leksikon minimal
+# sebesar ini, model ML tidak dijalankan sama sekali
+SENTIMENT_ML_SKIP_MARGIN = int(os.getenv("SENTIMENT_ML_SKIP_MARGIN", "3"))
+
+_ml_skip_lock = threading.Lock()
+_ml_skip_counters = {"skipped": 0, "ran": 0}
+
+_chunking_lock = threading.Lock()
+_chunking_counters = {"texts": 0, "long_texts": 0, "windows": 0, "tokens": 0, "padded_tokens": 0}
+
+# Jumlah teks per forward pass saat menganalisis banyak review sekaligus
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+# Micro-batching: panggilan analyze_sentiment yang bersamaan digabung menjadi satu forward pass
+SENTIMENT_MICRO_BATCHING = os.getenv("SENTIMENT_MICRO_BATCHING", "true").lower() in ("1", "true", "yes")
+SENTIMENT_MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "16"))
+SENTIMENT_MAX_WAIT_MS = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "5"))
 
 def get_sentiment_analyzer():
     global sentiment_pipeline
     if sentiment_pipeline is None:
-        # Menggunakan model analisis sentimen pra-latih
-        sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-            device=0 if torch.cuda.is_available() else -1
-        )
+        with _pipeline_lock:
+            if sentiment_pipeline is None:
+                sentiment_pipeline = _load_pipeline()
     return sentiment_pipeline
 
-def _detect_language(text: str) -> str:
-    """Detect if text is in Indonesian or English - improved sensitivity with more patterns"""
-    indonesian_indicators = [
-        # Kata umum
-        'yang', 'dan', 'atau', 'dengan', 'untuk', 'dari', 'ini', 'itu', 'sangat', 'sekali',
-        # Kata-kata sentimen
-        'bagus', 'jelek', 'buruk', 'mantap', 'keren', 'puas', 'kecewa', 'mengecewakan',
-        # Terkait produk
-        'produk', 'barang', 'kualitas', 'harga', 'pelayanan', 'pengiriman', 'rekomendasi',
-        # Kata ganti dan kata umum
-        'saya', 'kami', 'mereka', 'anda', 'sudah', 'belum', 'akan', 'tidak', 'bukan',
-        # Partikel dan ekspresi umum
-        'jadi', 'juga', 'saja', 'sih', 'nih', 'dong', 'lah', 'kan', 'ya', 'gak', 'ga',
-        # Penguat (intensifier)
-        'sangat', 'banget', 'sekali', 'amat', 'terlalu', 'cukup', 'lumayan', 'agak',
-        # Kata-kata kepuasan
-        'memuaskan', 'mengecewakan', 'direkomendasikan', 'tidak direkomendasikan',
-        # Spesifik makanan/produk
-        'enak', 'enak dimakan', 'lezat', 'nikmat', 'sedap', 'gurih', 'rasanya',
-        # Penampilan
-        'cantik', 'menarik', 'indah', 'rapi', 'bersih', 'tampilannya', 'tampilan',
-        # Frasa umum
-        'keren dan', 'bagus dan', 'enak dan', 'keren enak', 'bagus enak',
-        # Kata-kata khusus Bahasa Indonesia lainnya
-        'produknya', 'barangnya', 'rasanya', 'tampilannya', 'kualitasnya', 'harganya',
-        'pelayanannya', 'pengirimannya', 'kemasannya', 'packagingnya',
-        # Bentuk kepemilikan Bahasa Indonesia
-        'nya', 'ku', 'mu', 'kita', 'kalian',
-        # Ekspresi Bahasa Indonesia umum lainnya
-        'si', 'sih', 'dong', 'deh', 'kok', 'loh', 'dah', 'nih', 'tuh',
-        # Kata sambung Bahasa Indonesia
-        'tapi', 'tetapi', 'namun', 'meskipun', 'walaupun', 'karena', 'sehingga',
-        # Penanda waktu/tense Bahasa Indonesia
-        'sudah', 'belum', 'akan', 'sedang', 'telah', 'pernah', 'selalu', 'kadang',
-        # Kata tanya Bahasa Indonesia
-        'apa', 'siapa', 'kapan', 'dimana', 'kenapa', 'mengapa', 'bagaimana',
-        # Kata tunjuk Bahasa Indonesia
-        'ini', 'itu', 'sini', 'situ', 'sana',
-        # Preposisi Bahasa Indonesia
-        'di', 'ke', 'dari', 'pada', 'dengan', 'untuk', 'oleh', 'kepada', 'terhadap'
-    ]
-    
-    text_lower = text.lower()
-    indonesian_count = sum(1 for word in indonesian_indicators if word in text_lower)
+def _load_pipeline():
+    if SENTIMENT_BACKEND not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown SENTIMENT_BACKEND '{SENTIMENT_BACKEND}', expected one of {SENTIMENT_BACKENDS}")
+    if SENTIMENT_BACKEND in ("onnx", "onnx-int8"):
+        # Torch tidak diimpor sama sekali pada backend ONNX
+        from onnx_sentiment import OnnxSentimentPipeline
+        return OnnxSentimentPipeline(
+            SENTIMENT_ONNX_PATH,
+            quantized=SENTIMENT_BACKEND == "onnx-int8",
+            num_threads=SENTIMENT_ONNX_THREADS
+        )
+    return _load_torch_pipeline()
+
+def _load_torch_pipeline():
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+    import torch
     
-    # Juga periksa pola khusus Bahasa Indonesia (diperluas)
-    indonesian_patterns = [
-        # Pola makanan/rasa
-        r'\b(enak|lezat|nikmat|sedap|gurih)\s+(dimakan|rasanya|banget|sekali|sangat)',
-        r'\b(rasa|rasanya)\s+(enak|lezat|nikmat|sedap|gurih)',
-        # Pola penampilan
-        r'\b(keren|bagus|mantap|cantik|menarik)\s+(dan|enak|banget|sekali|sangat)',
-        r'\b(tampilan|tampilannya)\s+(keren|bagus|cantik|menarik|rapi)',
-        # Pola penguat (intensifier)
-        r'\b(sangat|banget|amat|terlalu)\s+(enak|lezat|keren|bagus|mantap|puas)',
-        r'\b(enak|keren|bagus|mantap)\s+(banget|sekali|sangat|amat)',
-        # Pola kepemilikan (sangat khas Bahasa Indonesia)
-        r'\b(produk|barang|kualitas|harga|pelayanan|pengiriman|kemasan|packaging)nya\s+',
-        r'\b(rasa|tampilan|kualitas|harga)nya\s+',
-        # Pola frasa umum Bahasa Indonesia
-        r'\b(keren|bagus|mantap)\s+dan\s+(enak|lezat|bagus|keren)',
-        r'\b(enak|lezat)\s+dan\s+(keren|bagus|mantap)',
-        r'\b(produknya|barangnya)\s+(keren|bagus|enak|mantap)',
-        # Pola negasi
-        r'\b(tidak|belum|bukan|kurang)\s+(bagus|baik|puas|memuaskan|enak|keren)',
-        # Pola rekomendasi
-        r'\b(direkomendasikan|rekomendasi|sarankan|disarankan)\s+(untuk|bagi|kepada)',
+    device = 0 if torch.cuda.is_available() else -1
+    if SENTIMENT_MODEL_PATH:
+        # Muat dari direktori lokal yang di-pin tanpa menghubungi Hugging Face Hub
+        tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_PATH, local_files_only=True)
+        model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_PATH, local_files_only=True)
+        return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=device)
+    # Menggunakan model analisis sentimen pra-latih
+    return pipeline(
+        "sentiment-analysis",
+        model=SENTIMENT_MODEL_NAME,
+        device=device
+    )
+
+def set_inference_threads(threads: int):
+    """Limit model inference in this process to `threads` intra-op threads"""
+    global SENTIMENT_ONNX_THREADS
+    threads = max(1, threads)
+    if SENTIMENT_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(threads)
+    else:
+        # Berlaku untuk sesi ONNX Runtime yang dibuat setelah ini
+        SENTIMENT_ONNX_THREADS = threads
+
+def warmup_sentiment_model(runs: int = SENTIMENT_WARMUP_RUNS):
+    """
+    Load the model and run a few dummy inferences so the first real request
+    does not pay for deserialisation and first-inference overhead.
+    Marks the model as ready when done.
+    """
+    global _model_error
+    samples = [
+        "Produknya keren dan enak dimakan, pengiriman cepat",
+        "Barangnya rusak dan sangat mengecewakan",
+        "This product is amazing, great quality and fast shipping.",
+        "Terrible quality, the worst purchase I have made.",
     ]
-    
-    pattern_matches = sum(1 for pattern in indonesian_patterns if re.search(pattern, text_lower))
-    
-    # Periksa pola urutan kata Bahasa Indonesia (subjek-kata kerja-objek yang khas)
-    # Bahasa Indonesia sering menggunakan "produknya keren" vs Bahasa Inggris "the product is cool"
-    indonesian_word_order_patterns = [
-        r'\b\w+nya\s+(keren|bagus|enak|mantap|jelek|buruk)',  # "produknya keren"
-        r'\b\w+nya\s+dan\s+\w+',  # "produknya keren dan enak"
+    try:
+        start = time.perf_counter()
+        if _inference_client is not None:
+            _wait_for_inference_server()
+        for _ in range(max(1, runs)):
+            _predict_texts(samples[:1])
+            _predict_texts(samples)
+        _model_error = None
+        _model_ready.set()
+        print(f"✓ Sentiment model warmed up in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        _model_error = str(e)
+        print(f"Warning: Sentiment model warmup failed: {e}")
+
+def _wait_for_inference_server(poll_interval: float = 1.0):
+    """Block until the inference server answers, for up to SENTIMENT_SERVER_TIMEOUT seconds"""
+    deadline = time.monotonic() + SENTIMENT_SERVER_TIMEOUT
+    while True:
+        try:
+            _inference_client.stats()
+            return
+        except Exception:
+            # Server mungkin masih memuat model: coba lagi sampai batas waktu
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(poll_interval)
+
+def is_model_ready() -> bool:
+    return _model_ready.is_set()
+
+def model_status() -> str:
+    """Readiness description for the sentiment model"""
+    if _model_ready.is_set():
+        return "ready"
+    if _model_error:
+        return f"error: {_model_error}"
+    return "loading"
+
+def _split_windows(text: str, offsets: List[Tuple[int, int]]) -> List[Tuple[str, int]]:
+    """Split a text into (window text, token count) pairs of at most SENTIMENT_WINDOW_TOKENS tokens"""
+    token_count = len(offsets)
+    window = max(1, SENTIMENT_WINDOW_TOKENS)
+    if token_count <= window:
+        return [(text, max(1, token_count))]
+    step = max(1, window - SENTIMENT_WINDOW_OVERLAP)
+    windows = []
+    for start in range(0, token_count, step):
+        end = min(start + window, token_count)
+        # Potong teks asli pada batas karakter token agar tidak perlu decode ulang
+        windows.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+        if end == token_count:
+            break
+    return windows
+
+def _aggregate_windows(window_scores: List[Dict[str, float]], weights: List[int]) -> dict:
+    """Token-weighted average of per-window class probabilities, as one {'label', 'score'}"""
+    total = sum(weights)
+    combined = {}
+    for scores, weight in zip(window_scores, weights):
+        for label, score in scores.items():
+            combined[label] = combined.get(label, 0.0) + score * weight / total
+    label = max(combined, key=combined.get)
+    return {"label": label, "score": combined[label]}
+
+def _predict_texts(texts: List[str], batch_size: int = None) -> List[dict]:
+    """Raw ML prediction per text, from the inference server when one is configured"""
+    if _inference_client is not None:
+        return _inference_client.predict(texts)
+    return _predict_texts_local(texts, batch_size)
+
+def _predict_texts_local(texts: List[str], batch_size: int = None) -> List[dict]:
+    """
+    Raw ML prediction per text, using the model loaded in this process.
+    Long texts are split into token windows; all windows of all texts are
+    sorted by length and run in batches (less padding per forward pass),
+    then aggregated back into one {'label', 'score'} per text.
+    """
+    analyzer = get_sentiment_analyzer()
+    encodings = analyzer.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+
+    windows = []
+    owners = []
+    lengths = []
+    long_texts = 0
+    for index, (text, offsets) in enumerate(zip(texts, encodings["offset_mapping"])):
+        text_windows = _split_windows(text, offsets)
+        if len(text_windows) > 1:
+            long_texts += 1
+        for window_text, length in text_windows:
+            windows.append(window_text)
+            owners.append(index)
+            lengths.append(length)
+
+    # Length bucketing: jendela dengan panjang serupa masuk batch yang sama
+    batch_size = batch_size or len(windows)
+    order = sorted(range(len(windows)), key=lengths.__getitem__)
+    outputs = analyzer([windows[i] for i in order], batch_size=batch_size, top_k=None, truncation=True)
+    window_scores = [None] * len(windows)
+    for i, output in zip(order, outputs):
+        window_scores[i] = {result['label']: result['score'] for result in output}
+
+    padded_tokens = 0
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        padded_tokens += lengths[batch[-1]] * len(batch)
+    with _chunking_lock:
+        _chunking_counters["texts"] += len(texts)
+        _chunking_counters["long_texts"] += long_texts
+        _chunking_counters["windows"] += len(windows)
+        _chunking_counters["tokens"] += sum(lengths)
+        _chunking_counters["padded_tokens"] += padded_tokens
+
+    per_text_scores = [[] for _ in texts]
+    per_text_weights = [[] for _ in texts]
+    for owner, scores, length in zip(owners, window_scores, lengths):
+        per_text_scores[owner].append(scores)
+        per_text_weights[owner].append(length)
+    return [
+        _aggregate_windows(scores, weights)
+        for scores, weights in zip(per_text_scores, per_text_weights)
     ]
-    
-    word_order_matches = sum(1 for pattern in indonesian_word_order_patterns if re.search(pattern, text_lower))
-    
-    # Jika ditemukan indikator/pola/urutan kata khas Indonesia, kemungkinan bahasa adalah Indonesia
-    # Turunkan ambang lagi untuk mendeteksi ulasan pendek dengan lebih baik
-    if indonesian_count >= 1 or pattern_matches >= 1 or word_order_matches >= 1:
-        return 'id'
-    return 'en'
+
+def chunking_stats() -> dict:
+    """Window and padding counters for observing long-review handling"""
+    with _chunking_lock:
+        counters = dict(_chunking_counters)
+    counters["padding_efficiency"] = (
+        round(counters["tokens"] / counters["padded_tokens"], 3) if counters["padded_tokens"] else 1.0
+    )
+    return counters
+
+def sentiment_server_status():
+    """Stats reported by the inference server, or None when inference runs in-process"""
+    if _inference_client is None:
+        return None
+    try:
+        return _inference_client.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+def _predict_batch(texts: List[str]) -> List[dict]:
+    """Run one padded forward pass over a list of texts (and the windows of long ones)"""
+    return _predict_texts(texts)
+
+sentiment_batcher = MicroBatcher(
+    _predict_batch,
+    max_batch_size=SENTIMENT_MAX_BATCH_SIZE,
+    max_wait_ms=SENTIMENT_MAX_WAIT_MS,
+    name="sentiment-batcher"
+)
+
+def _predict(text: str) -> dict:
+    """
+    Get the raw ML prediction for one text.
+    With micro-batching enabled, concurrent callers share one forward pass.
+    """
+    if SENTIMENT_MICRO_BATCHING:
+        return sentiment_batcher.submit(text)
+    return _predict_texts([text])[0]
 
 def _analyze_sentiment_indonesian(text: str) -> str:
     """
     Rule-based sentiment analysis specifically for Indonesian text.
     More accurate for Indonesian reviews.
     """
+    return _score_sentiment_indonesian(text)[0]
+
+def _score_sentiment_indonesian(text: str) -> Tuple[str, int]:
+    """
+    Rule-based verdict plus its margin: the gap between the positive and
+    negative lexicon scores. A large margin means the lexicon is decisive.
+    """
     text_lower = text.lower()
+    word_count = len(text_lower.split())
     
-    # Indikator positif kuat (Bahasa Indonesia) - diperluas dengan ekspresi yang lebih nuansa
-    strong_positive = [
-        'sangat bagus', 'sangat baik', 'sangat puas', 'sangat memuaskan', 'sangat direkomendasikan',
-        'luar biasa', 'sempurna', 'mantap banget', 'keren banget', 'bagus banget',
-        'sangat suka', 'sangat senang', 'sangat terkesan', 'sangat impressed',
-        'worth it', 'worth every penny', 'sangat worth it', 'sangat worth',
-        'terbaik', 'paling bagus', 'paling baik', 'paling puas',
-        'excellent', 'amazing', 'fantastic', 'wonderful', 'outstanding',
-        'recommended', 'sangat recommended', 'highly recommended', 'sangat direkomendasikan',
-        'love it', 'suka banget', 'cinta banget', 'fall in love',
-        # Ekspresi gabungan positif (umum di Indonesia) - diperluas
-        'keren dan enak', 'bagus dan enak', 'keren dan bagus', 'enak dan keren',
-        'keren enak', 'bagus enak', 'mantap enak', 'enak mantap',
-        'sangat enak', 'enak banget', 'sangat lezat', 'lezat banget',
-        'sangat menarik', 'menarik banget', 'cantik banget', 'sangat cantik',
-        # Kombinasi kepuasan kuat
-        'puas banget', 'sangat cocok', 'cocok banget', 'sangat sesuai', 'sesuai banget',
-        # Kepemilikan + positif (pola khas Indonesia: "produknya keren")
-        'produknya keren', 'produknya bagus', 'produknya enak', 'produknya mantap',
-        'barangnya keren', 'barangnya bagus', 'barangnya enak', 'barangnya mantap',
-        'rasanya enak', 'rasanya lezat', 'rasanya nikmat', 'rasanya sedap',
-        'tampilannya keren', 'tampilannya bagus', 'tampilannya cantik', 'tampilannya menarik',
-        'kualitasnya bagus', 'kualitasnya baik', 'kualitasnya memuaskan',
-        'harganya worth', 'harganya sesuai', 'harganya pas',
-        # Ekspresi positif spesifik makanan
-        'enak dimakan', 'lezat dimakan', 'nikmat dimakan', 'sedap dimakan',
-        'enak banget dimakan', 'lezat banget dimakan', 'sangat enak dimakan',
-        # Pola gabungan lainnya - kecocokan PERSIS untuk frasa umum Indonesia
-        'keren dan enak dimakan', 'bagus dan enak dimakan', 'keren enak dimakan',
-        'produknya keren dan enak', 'produknya bagus dan enak', 'produknya keren enak',
-        'produknya keren dan enak dimakan', 'barangnya keren dan enak dimakan',
-        # Pola eksak tambahan
-        'produknya keren dan enak', 'barangnya keren dan enak',
-        'keren dan enak', 'bagus dan enak', 'mantap dan enak'
-    ]
-    
-    # Indikator positif sedang (diperluas dengan ekspresi Bahasa Indonesia)
-    moderate_positive = [
-        'bagus', 'baik', 'puas', 'memuaskan', 'oke', 'ok', 'lumayan', 'cukup baik',
-        'keren', 'mantap', 'nice', 'good', 'great', 'fine', 'decent',
-        'rekomendasi', 'direkomendasikan', 'recommend', 'suggest',
-        'senang', 'suka', 'terkesan', 'impressed', 'satisfied',
-        # Food/product specific positive expressions - expanded
-        'enak', 'enak dimakan', 'enak banget', 'rasanya enak', 'rasa enak',
-        'lezat', 'nikmat', 'sedap', 'gurih', 'manis',
-        # Visual/appearance positive - expanded
-        'cantik', 'menarik', 'indah', 'rapi', 'bersih', 'bagus tampilannya',
-        # General satisfaction
-        'cocok', 'sesuai', 'pas', 'tepat', 'benar', 'tepat sasaran',
-        # Possessive forms (moderate positive)
-        'produknya', 'barangnya', 'kualitasnya', 'harganya', 'pelayanannya',
-        # Simple combinations (moderate)
-        'keren dan', 'bagus dan', 'enak dan', 'mantap dan',
-        # Short positive expressions
-        'keren', 'enak', 'bagus', 'mantap'  # Standalone can be positive
-    ]
-    
-    # Indikator negatif kuat
-    strong_negative = [
-        'sangat jelek', 'sangat buruk', 'sangat kecewa', 'sangat mengecewakan',
-        'sangat tidak puas', 'sangat tidak memuaskan', 'sangat tidak direkomendasikan',
-        'sangat tidak sesuai', 'sangat tidak cocok', 'sangat tidak worth it',
-        'terburuk', 'paling jelek', 'paling buruk', 'paling kecewa',
-        'gagal total', 'sangat gagal', 'sangat rusak', 'sangat cacat',
-        'waste of money', 'buang uang', 'rugi', 'sangat rugi',
-        'terrible', 'awful', 'horrible', 'worst', 'disappointed', 'very disappointed'
-    ]
-    
-    # Indikator negatif sedang
-    moderate_negative = [
-        'jelek', 'buruk', 'kecewa', 'mengecewakan', 'tidak puas', 'tidak memuaskan',
-        'tidak sesuai', 'tidak cocok', 'tidak worth it', 'tidak direkomendasikan',
-        'gagal', 'rusak', 'cacat', 'kurang baik', 'kurang bagus', 'kurang memuaskan',
-        'bad', 'poor', 'disappointed', 'unsatisfied', 'not good', 'not worth',
-        'masalah', 'ada masalah', 'banyak masalah', 'sering masalah'
-    ]
-    
-    # Hitung kemunculan - gunakan pencocokan fleksibel untuk frasa Bahasa Indonesia
-    # Untuk frasa multi-kata, gunakan pencarian substring (lebih fleksibel untuk Bahasa Indonesia)
-    strong_pos_count = 0
-    for phrase in strong_positive:
-        if len(phrase.split()) > 1:
-            # Frasa multi-kata: gunakan pencocokan substring (lebih fleksibel)
-            # Ini menangkap contoh seperti "produknya keren dan enak dimakan"
-            if phrase in text_lower:
-                strong_pos_count += 1
-        else:
-            # Kata tunggal: gunakan batas kata
-            if re.search(r'\b' + re.escape(phrase) + r'\b', text_lower):
-                strong_pos_count += 1
-    
-    moderate_pos_count = 0
-    for phrase in moderate_positive:
-        if len(phrase.split()) > 1:
-            if phrase in text_lower:
-                moderate_pos_count += 1
-        else:
-            if re.search(r'\b' + re.escape(phrase) + r'\b', text_lower):
-                moderate_pos_count += 1
-    
-    strong_neg_count = sum(1 for phrase in strong_negative if re.search(r'\b' + re.escape(phrase) + r'\b', text_lower))
-    moderate_neg_count = sum(1 for phrase in moderate_negative if re.search(r'\b' + re.escape(phrase) + r'\b', text_lower))
-    
-    # Juga periksa pola khusus Bahasa Indonesia yang mengindikasikan sentimen positif
-    # Pola: "produknya keren dan enak dimakan" - harus memberikan skor tinggi
-    indonesian_positive_patterns = [
-        r'produknya\s+(keren|bagus|enak|mantap)',
-        r'barangnya\s+(keren|bagus|enak|mantap)',
-        r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
-        r'(enak|lezat)\s+(dimakan|rasanya|banget)',
-        r'(keren|bagus|mantap)\s+(enak|lezat)\s+dimakan',
-        r'produknya\s+(keren|bagus)\s+dan\s+enak',
-        # More specific patterns for common combinations
-        r'produknya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)\s+dimakan',
-        r'produknya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
-        r'barangnya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
-        # Pattern for "keren dan enak" anywhere in text
-        r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)\s+dimakan',
-        r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
-    ]
-    
-    pattern_pos_count = sum(1 for pattern in indonesian_positive_patterns if re.search(pattern, text_lower))
-    
-    # Juga periksa jika teks mengandung banyak kata positif (meskipun tidak persis dalam pola)
-    # Ini membantu menangkap kasus seperti "produknya keren dan enak dimakan"
-    individual_positive_words = ['keren', 'enak', 'bagus', 'mantap', 'lezat', 'nikmat', 'sedap', 'gurih']
-    positive_word_count = sum(1 for word in individual_positive_words if re.search(r'\b' + word + r'\b', text_lower))
+    # Semua frasa leksikon dicocokkan dalam satu kali pemindaian (lihat sentiment_lexicon.py)
+    counts = sentiment_lexicon.count_indicators(text_lower)
+    strong_pos_count = counts.strong_pos
+    moderate_pos_count = counts.moderate_pos
+    strong_neg_count = counts.strong_neg
+    moderate_neg_count = counts.moderate_neg
+    pattern_pos_count = counts.pattern_pos
+    positive_word_count = counts.positive_words
+    has_possessive = counts.has_possessive
     
     # Pemeriksaan khusus: jika teks mengandung "produknya" atau "barangnya" + kata positif, besar kemungkinan positif
-    has_possessive = bool(re.search(r'\b(produknya|barangnya|rasanya|tampilannya)\b', text_lower))
     if has_possessive and positive_word_count >= 1:
         pattern_pos_count += 2  # Bonus kuat untuk kepemilikan + kata positif
     
     # Jika terdapat 2+ kata positif, kemungkinan besar positif (terutama untuk ulasan pendek)
     if positive_word_count >= 2:
         pattern_pos_count += 2  # Bonus meningkat untuk banyak kata positif
-    elif positive_word_count >= 1 and len(text_lower.split()) <= 15:
+    elif positive_word_count >= 1 and word_count <= 15:
         # Untuk ulasan pendek, bahkan 1 kata positif dengan pola kemungkinan besar positif
         if pattern_pos_count > 0:
             pattern_pos_count += 1
@@ -255,24 +326,11 @@ def _analyze_sentiment_indonesian(text: str) -> str:
     positive_score = (strong_pos_count * 3) + moderate_pos_count + (pattern_pos_count * 3)  # Increased pattern weight
     negative_score = (strong_neg_count * 3) + moderate_neg_count
     
-    # Periksa pola negasi (Bahasa Indonesia)
-    negation_patterns = [
-        r'tidak\s+(bagus|baik|puas|memuaskan|direkomendasikan|worth|suka|senang)',
-        r'belum\s+(bagus|baik|puas|memuaskan)',
-        r'bukan\s+(bagus|baik|puas|memuaskan)',
-        r'kurang\s+(bagus|baik|puas|memuaskan)',
-        r'tidak\s+(jelek|buruk|kecewa|mengecewakan)',
-    ]
-    
     # Jika ditemukan negasi, sesuaikan skor
-    for pattern in negation_patterns:
-        if re.search(pattern, text_lower):
-            # Jika membalikkan positif, tingkatkan skor negatif
-            if 'bagus' in pattern or 'baik' in pattern or 'puas' in pattern:
-                negative_score += 2
-            # Jika membalikkan negatif, tingkatkan skor positif
-            elif 'jelek' in pattern or 'buruk' in pattern or 'kecewa' in pattern:
-                positive_score += 2
+    # (negasi kata positif menambah skor negatif, negasi kata negatif menambah skor positif)
+    negative_score += counts.negation_negative
+    positive_score += counts.negation_positive
+    margin = abs(positive_score - negative_score)
     
     # Tentukan sentimen (logika diperbaiki untuk kepekaan yang lebih baik terhadap Bahasa Indonesia)
     # Untuk Bahasa Indonesia, sangat peka terhadap indikator positif, terutama pada ulasan pendek
@@ -281,120 +339,191 @@ def _analyze_sentiment_indonesian(text: str) -> str:
     if pattern_pos_count > 0:
         # Jika terdapat pola positif jelas dan tidak ada negatif kuat, pasti positif
         if negative_score == 0 or positive_score >= negative_score:
-            return 'positive'
+            return 'positive', margin
         # Bahkan dengan beberapa negatif, jika pola kuat tetap positif
         if pattern_pos_count >= 2:
-            return 'positive'
+            return 'positive', margin
     
     # PRIORITAS 2: Banyak kata positif (terutama dengan bentuk kepemilikan)
     if positive_word_count >= 2:
         # Dua atau lebih kata positif = pasti positif (kecuali ada negatif kuat)
         if negative_score == 0 or (positive_score >= negative_score and strong_neg_count == 0):
-            return 'positive'
+            return 'positive', margin
     
     # PRIORITAS 3: Kepemilikan + kata positif (pola yang sangat umum di Indonesia)
     if has_possessive and positive_word_count >= 1 and negative_score == 0:
-        return 'positive'
+        return 'positive', margin
     
     # PRIORITAS 4: Logika pemeringkatan standar
     if positive_score > negative_score:
         # Meskipun skornya rendah, jika lebih tinggi dari negatif, maka positif
         if positive_score >= 1:
-            return 'positive'
+            return 'positive', margin
         # Untuk ulasan sangat pendek dengan indikator positif, anggap positif
-        elif len(text_lower.split()) <= 15 and (strong_pos_count > 0 or moderate_pos_count > 0 or pattern_pos_count > 0):
-            return 'positive'
+        elif word_count <= 15 and (strong_pos_count > 0 or moderate_pos_count > 0 or pattern_pos_count > 0):
+            return 'positive', margin
     elif negative_score > positive_score:
         if negative_score >= 1:
-            return 'negative'
+            return 'negative', margin
         # Untuk ulasan sangat pendek dengan indikator negatif, anggap negatif
-        elif len(text_lower.split()) <= 15 and (strong_neg_count > 0 or moderate_neg_count > 0):
-            return 'negative'
+        elif word_count <= 15 and (strong_neg_count > 0 or moderate_neg_count > 0):
+            return 'negative', margin
     
     # PRIORITAS 5: Fallback - periksa adanya indikator apapun
     if strong_pos_count > 0 or pattern_pos_count > 0 or (moderate_pos_count >= 2):
-        return 'positive'
+        return 'positive', margin
     elif moderate_pos_count >= 1 and negative_score == 0:
         # Satu kata positif tanpa negatif = positif (untuk ulasan pendek)
-        if len(text_lower.split()) <= 15:
-            return 'positive'
+        if word_count <= 15:
+            return 'positive', margin
     elif strong_neg_count > 0 or moderate_neg_count >= 2:
-        return 'negative'
+        return 'negative', margin
     else:
+        return 'neutral', margin
+    return None, margin
+
+def _combine_indonesian_result(rule_based_result: str, ml_result: dict) -> str:
+    """Combine the rule-based verdict with an ML prediction for Indonesian text"""
+    label = ml_result['label'].upper()
+    score = ml_result['score']
+    
+    # Map ML result
+    ml_sentiment = 'neutral'
+    if 'LABEL_2' in label or 'POSITIVE' in label or 'POS' in label:
+        ml_sentiment = 'positive'
+    elif 'LABEL_0' in label or 'NEGATIVE' in label or 'NEG' in label:
+        ml_sentiment = 'negative'
+    
+    # Jika kepercayaan ML tinggi (score > 0.7), utamakan hasilnya
+    # Jika tidak, utamakan metode berbasis aturan untuk Bahasa Indonesia
+    if score > 0.7:
+        # Hasil ML dengan kepercayaan tinggi
+        if ml_sentiment == rule_based_result:
+            return ml_sentiment
+        # Jika keduanya berbeda, gunakan berbasis aturan (lebih akurat untuk Bahasa Indonesia)
+        return rule_based_result
+    else:
+        # ML dengan kepercayaan rendah, utamakan berbasis aturan
+        return rule_based_result
+
+def _map_ml_result(result: dict) -> str:
+    """Map a raw pipeline prediction to 'positive', 'negative' or 'neutral'"""
+    label = result['label'].upper()
+    score = result['score']
+    
+    # Model cardiffnlp menggunakan LABEL_0 (negatif), LABEL_1 (netral), LABEL_2 (positif)
+    if 'LABEL_2' in label or 'POSITIVE' in label or 'POS' in label:
+        return 'positive'
+    elif 'LABEL_0' in label or 'NEGATIVE' in label or 'NEG' in label:
+        return 'negative'
+    elif 'LABEL_1' in label or 'NEUTRAL' in label:
         return 'neutral'
+    else:
+        # Cadangan: gunakan skor untuk menentukan sentimen
+        if score < 0.5:
+            return 'neutral'
+        label_lower = label.lower()
+        if 'positive' in label_lower or 'pos' in label_lower:
+            return 'positive'
+        elif 'negative' in label_lower or 'neg' in label_lower:
+            return 'negative'
+        else:
+            return 'neutral'
+
+def _should_skip_ml(margin: int) -> bool:
+    """Whether the lexicon verdict is decisive enough to skip the model, and count the outcome"""
+    skip = margin >= SENTIMENT_ML_SKIP_MARGIN
+    with _ml_skip_lock:
+        _ml_skip_counters["skipped" if skip else "ran"] += 1
+    return skip
+
+def ml_skip_stats() -> dict:
+    """How often Indonesian reviews were decided by the lexicon alone"""
+    with _ml_skip_lock:
+        counters = dict(_ml_skip_counters)
+    total = counters["skipped"] + counters["ran"]
+    counters["skip_rate"] = round(counters["skipped"] / total, 3) if total else 0
+    counters["margin_threshold"] = SENTIMENT_ML_SKIP_MARGIN
+    return counters
 
-def analyze_sentiment(text: str) -> str:
+def analyze_sentiment(text: str, language: str = None) -> str:
     """
     Analyze sentiment of the review text.
     Uses ML model first, then falls back to rule-based analysis for Indonesian.
+    Pass `language` when it was already detected for this review.
     Returns: 'positive', 'negative', or 'neutral'
     """
-    # Detect language
-    language = _detect_language(text)
+    # Deteksi bahasa (kecuali sudah dideteksi oleh pemanggil)
+    language = language or detect_language(text)
     
     # Untuk Bahasa Indonesia, gunakan pendekatan hibrida: model ML + berbasis aturan
     if language == 'id':
         # Pertama coba berbasis aturan (lebih akurat untuk Bahasa Indonesia)
-        rule_based_result = _analyze_sentiment_indonesian(text)
+        rule_based_result, margin = _score_sentiment_indonesian(text)
+        if _should_skip_ml(margin):
+            return rule_based_result
         
         # Juga coba model ML
         try:
-            analyzer = get_sentiment_analyzer()
-            ml_result = analyzer(text)[0]
-            
-            label = ml_result['label'].upper()
-            score = ml_result['score']
-            
-            # Map ML result
-            ml_sentiment = 'neutral'
-            if 'LABEL_2' in label or 'POSITIVE' in label or 'POS' in label:
-                ml_sentiment = 'positive'
-            elif 'LABEL_0' in label or 'NEGATIVE' in label or 'NEG' in label:
-                ml_sentiment = 'negative'
-            
-            # Jika kepercayaan ML tinggi (score > 0.7), utamakan hasilnya
-            # Jika tidak, utamakan metode berbasis aturan untuk Bahasa Indonesia
-            if score > 0.7:
-                # Hasil ML dengan kepercayaan tinggi
-                if ml_sentiment == rule_based_result:
-                    return ml_sentiment
-                # Jika keduanya berbeda, gunakan berbasis aturan (lebih akurat untuk Bahasa Indonesia)
-                return rule_based_result
-            else:
-                # ML dengan kepercayaan rendah, utamakan berbasis aturan
-                return rule_based_result
+            ml_result = _predict(text)
+            return _combine_indonesian_result(rule_based_result, ml_result)
         except Exception as e:
             print(f"ML sentiment analysis error: {e}, using rule-based")
             return rule_based_result
     
     # Untuk Bahasa Inggris, gunakan model ML
     try:
-        analyzer = get_sentiment_analyzer()
-        result = analyzer(text)[0]
-        
-        label = result['label'].upper()
-        score = result['score']
-        
-        # Model cardiffnlp menggunakan LABEL_0 (negatif), LABEL_1 (netral), LABEL_2 (positif)
-        if 'LABEL_2' in label or 'POSITIVE' in label or 'POS' in label:
-            return 'positive'
-        elif 'LABEL_0' in label or 'NEGATIVE' in label or 'NEG' in label:
-            return 'negative'
-        elif 'LABEL_1' in label or 'NEUTRAL' in label:
-            return 'neutral'
-        else:
-            # Cadangan: gunakan skor untuk menentukan sentimen
-            if score < 0.5:
-                return 'neutral'
-            label_lower = label.lower()
-            if 'positive' in label_lower or 'pos' in label_lower:
-                return 'positive'
-            elif 'negative' in label_lower or 'neg' in label_lower:
-                return 'negative'
-            else:
-                return 'neutral'
+        result = _predict(text)
+        return _map_ml_result(result)
     except Exception as e:
         print(f"Error in sentiment analysis: {e}")
         # Cadangan: kembali ke metode berbasis aturan bahkan untuk bahasa Inggris
         return _analyze_sentiment_indonesian(text)
 
+def analyze_sentiment_batch(texts: List[str]) -> List[str]:
+    """
+    Analyze sentiment for many reviews at once.
+    Runs the ML model over the whole list as padded batches instead of one
+    forward pass per review; results match analyze_sentiment() per text.
+    The lexicon verdicts of all Indonesian reviews come from one
+    bulk_scorer pass, and those with a decisive verdict skip the model.
+    """
+    if not texts:
+        return []
+    
+    # Teks yang sama cukup diinferensi sekali
+    unique_texts = list(dict.fromkeys(texts))
+    
+    # Putusan leksikon semua ulasan Indonesia dihitung sekaligus (bulk_scorer, label sama
+    # dengan _score_sentiment_indonesian); yang tegas tidak perlu masuk batch model
+    indonesian = [text for text in unique_texts if detect_language(text) == 'id']
+    labels, margins = bulk_scorer.score_sentiment_indonesian_bulk(indonesian)
+    scores = dict(zip(indonesian, zip(labels, margins.tolist())))
+    sentiments = {}
+    rule_based = {}
+    ml_texts = []
+    for text in unique_texts:
+        if text in scores:
+            rule_based_result, margin = scores[text]
+            if _should_skip_ml(margin):
+                sentiments[text] = rule_based_result
+                continue
+            rule_based[text] = rule_based_result
+        ml_texts.append(text)
+    
+    try:
+        ml_results = _predict_texts(ml_texts, batch_size=SENTIMENT_BATCH_SIZE) if ml_texts else []
+    except Exception as e:
+        # Satu teks bermasalah jangan menggagalkan seluruh batch: ulangi per teks
+        print(f"Batch sentiment analysis error: {e}, falling back to per-review analysis")
+        for text in ml_texts:
+            sentiments[text] = analyze_sentiment(text)
+        return [sentiments[text] for text in texts]
+    
+    for text, ml_result in zip(ml_texts, ml_results):
+        if text in rule_based:
+            sentiments[text] = _combine_indonesian_result(rule_based[text], ml_result)
+        else:
+            sentiments[text] = _map_ml_result(ml_result)
+    
+    return [sentiments[text] for text in texts]
@@ -0,0 +1,275 @@
+"""
+Lexicon for the rule-based Indonesian sentiment analysis.
+The phrase lists are compiled once at import into a single Aho-Corasick
+automaton, so one pass over a review reports every strong/moderate/negative
+hit instead of running a separate regex search per phrase.
+"""
+import re
+from collections import namedtuple
+
+
+# Indikator positif kuat (Bahasa Indonesia) - diperluas dengan ekspresi yang lebih nuansa
+STRONG_POSITIVE = [
+    'sangat bagus', 'sangat baik', 'sangat puas', 'sangat memuaskan', 'sangat direkomendasikan',
+    'luar biasa', 'sempurna', 'mantap banget', 'keren banget', 'bagus banget',
+    'sangat suka', 'sangat senang', 'sangat terkesan', 'sangat impressed',
+    'worth it', 'worth every penny', 'sangat worth it', 'sangat worth',
+    'terbaik', 'paling bagus', 'paling baik', 'paling puas',
+    'excellent', 'amazing', 'fantastic', 'wonderful', 'outstanding',
+    'recommended', 'sangat recommended', 'highly recommended', 'sangat direkomendasikan',
+    'love it', 'suka banget', 'cinta banget', 'fall in love',
+    # Ekspresi gabungan positif (umum di Indonesia) - diperluas
+    'keren dan enak', 'bagus dan enak', 'keren dan bagus', 'enak dan keren',
+    'keren enak', 'bagus enak', 'mantap enak', 'enak mantap',
+    'sangat enak', 'enak banget', 'sangat lezat', 'lezat banget',
+    'sangat menarik', 'menarik banget', 'cantik banget', 'sangat cantik',
+    # Kombinasi kepuasan kuat
+    'puas banget', 'sangat cocok', 'cocok banget', 'sangat sesuai', 'sesuai banget',
+    # Kepemilikan + positif (pola khas Indonesia: "produknya keren")
+    'produknya keren', 'produknya bagus', 'produknya enak', 'produknya mantap',
+    'barangnya keren', 'barangnya bagus', 'barangnya enak', 'barangnya mantap',
+    'rasanya enak', 'rasanya lezat', 'rasanya nikmat', 'rasanya sedap',
+    'tampilannya keren', 'tampilannya bagus', 'tampilannya cantik', 'tampilannya menarik',
+    'kualitasnya bagus', 'kualitasnya baik', 'kualitasnya memuaskan',
+    'harganya worth', 'harganya sesuai', 'harganya pas',
+    # Ekspresi positif spesifik makanan
+    'enak dimakan', 'lezat dimakan', 'nikmat dimakan', 'sedap dimakan',
+    'enak banget dimakan', 'lezat banget dimakan', 'sangat enak dimakan',
+    # Pola gabungan lainnya - kecocokan PERSIS untuk frasa umum Indonesia
+    'keren dan enak dimakan', 'bagus dan enak dimakan', 'keren enak dimakan',
+    'produknya keren dan enak', 'produknya bagus dan enak', 'produknya keren enak',
+    'produknya keren dan enak dimakan', 'barangnya keren dan enak dimakan',
+    # Pola eksak tambahan
+    'produknya keren dan enak', 'barangnya keren dan enak',
+    'keren dan enak', 'bagus dan enak', 'mantap dan enak'
+]
+
+# Indikator positif sedang (diperluas dengan ekspresi Bahasa Indonesia)
+MODERATE_POSITIVE = [
+    'bagus', 'baik', 'puas', 'memuaskan', 'oke', 'ok', 'lumayan', 'cukup baik',
+    'keren', 'mantap', 'nice', 'good', 'great', 'fine', 'decent',
+    'rekomendasi', 'direkomendasikan', 'recommend', 'suggest',
+    'senang', 'suka', 'terkesan', 'impressed', 'satisfied',
+    # Food/product specific positive expressions - expanded
+    'enak', 'enak dimakan', 'enak banget', 'rasanya enak', 'rasa enak',
+    'lezat', 'nikmat', 'sedap', 'gurih', 'manis',
+    # Visual/appearance positive - expanded
+    'cantik', 'menarik', 'indah', 'rapi', 'bersih', 'bagus tampilannya',
+    # General satisfaction
+    'cocok', 'sesuai', 'pas', 'tepat', 'benar', 'tepat sasaran',
+    # Possessive forms (moderate positive)
+    'produknya', 'barangnya', 'kualitasnya', 'harganya', 'pelayanannya',
+    # Simple combinations (moderate)
+    'keren dan', 'bagus dan', 'enak dan', 'mantap dan',
+    # Short positive expressions
+    'keren', 'enak', 'bagus', 'mantap'  # Standalone can be positive
+]
+
+# Indikator negatif kuat
+STRONG_NEGATIVE = [
+    'sangat jelek', 'sangat buruk', 'sangat kecewa', 'sangat mengecewakan',
+    'sangat tidak puas', 'sangat tidak memuaskan', 'sangat tidak direkomendasikan',
+    'sangat tidak sesuai', 'sangat tidak cocok', 'sangat tidak worth it',
+    'terburuk', 'paling jelek', 'paling buruk', 'paling kecewa',
+    'gagal total', 'sangat gagal', 'sangat rusak', 'sangat cacat',
+    'waste of money', 'buang uang', 'rugi', 'sangat rugi',
+    'terrible', 'awful', 'horrible', 'worst', 'disappointed', 'very disappointed'
+]
+
+# Indikator negatif sedang
+MODERATE_NEGATIVE = [
+    'jelek', 'buruk', 'kecewa', 'mengecewakan', 'tidak puas', 'tidak memuaskan',
+    'tidak sesuai', 'tidak cocok', 'tidak worth it', 'tidak direkomendasikan',
+    'gagal', 'rusak', 'cacat', 'kurang baik', 'kurang bagus', 'kurang memuaskan',
+    'bad', 'poor', 'disappointed', 'unsatisfied', 'not good', 'not worth',
+    'masalah', 'ada masalah', 'banyak masalah', 'sering masalah'
+]
+
+# Pola khusus Bahasa Indonesia yang mengindikasikan sentimen positif
+# Pola: "produknya keren dan enak dimakan" - harus memberikan skor tinggi
+POSITIVE_PATTERNS = [
+    r'produknya\s+(keren|bagus|enak|mantap)',
+    r'barangnya\s+(keren|bagus|enak|mantap)',
+    r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
+    r'(enak|lezat)\s+(dimakan|rasanya|banget)',
+    r'(keren|bagus|mantap)\s+(enak|lezat)\s+dimakan',
+    r'produknya\s+(keren|bagus)\s+dan\s+enak',
+    # More specific patterns for common combinations
+    r'produknya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)\s+dimakan',
+    r'produknya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
+    r'barangnya\s+(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
+    # Pattern for "keren dan enak" anywhere in text
+    r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)\s+dimakan',
+    r'(keren|bagus|mantap)\s+dan\s+(enak|lezat)',
+]
+
+# Pola negasi (Bahasa Indonesia)
+NEGATION_PATTERNS = [
+    r'tidak\s+(bagus|baik|puas|memuaskan|direkomendasikan|worth|suka|senang)',
+    r'belum\s+(bagus|baik|puas|memuaskan)',
+    r'bukan\s+(bagus|baik|puas|memuaskan)',
+    r'kurang\s+(bagus|baik|puas|memuaskan)',
+    r'tidak\s+(jelek|buruk|kecewa|mengecewakan)',
+]
+
+# Kata positif tunggal dan bentuk kepemilikan yang dihitung terpisah (dengan batas kata)
+INDIVIDUAL_POSITIVE_WORDS = ['keren', 'enak', 'bagus', 'mantap', 'lezat', 'nikmat', 'sedap', 'gurih']
+POSSESSIVE_WORDS = ['produknya', 'barangnya', 'rasanya', 'tampilannya']
+
+# Setiap pola positif memuat salah satu kata ini, dan setiap pola negasi salah satu kata negasi ini;
+# pola regex hanya dijalankan jika kata pemicunya muncul di teks
+POSITIVE_PATTERN_TRIGGERS = ['keren', 'bagus', 'mantap', 'enak', 'lezat']
+NEGATION_TRIGGERS = ['tidak', 'belum', 'bukan', 'kurang']
+
+LexiconCounts = namedtuple("LexiconCounts", [
+    "strong_pos", "moderate_pos", "strong_neg", "moderate_neg",
+    "pattern_pos", "positive_words", "has_possessive",
+    "negation_negative", "negation_positive",
+])
+
+def _is_word_char(ch: str) -> bool:
+    # Sama dengan \w pada regex Python untuk str
+    return ch.isalnum() or ch == '_'
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of phrases.
+    find() reports, in one pass, which phrases occur anywhere in the text and
+    which occur with word boundaries on both sides (like r'\b' + phrase + r'\b').
+    """
+    def __init__(self, phrases):
+        self.phrases = list(dict.fromkeys(phrases))
+        self.index = {phrase: i for i, phrase in enumerate(self.phrases)}
+        self._lengths = [len(phrase) for phrase in self.phrases]
+        self._starts_with_word = [_is_word_char(phrase[0]) for phrase in self.phrases]
+        self._ends_with_word = [_is_word_char(phrase[-1]) for phrase in self.phrases]
+
+        # Bangun trie
+        goto = [{}]
+        outputs = [[]]
+        for phrase_id, phrase in enumerate(self.phrases):
+            state = 0
+            for ch in phrase:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(phrase_id)
+
+        # Fungsi failure (BFS), lalu jadikan DFA penuh agar pemindaian cukup satu lookup per karakter
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        order = list(goto[0].values())
+        head = 0
+        while head < len(order):
+            state = order[head]
+            head += 1
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                order.append(child)
+        self._delta = delta
+        self._outputs = [tuple(ids) for ids in outputs]
+
+    def find(self, text: str):
+        """Return (ids found as substrings, ids found with word boundaries)"""
+        delta = self._delta
+        outputs = self._outputs
+        lengths = self._lengths
+        anywhere = set()
+        bounded = set()
+        state = 0
+        last = len(text) - 1
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            for phrase_id in outputs[state]:
+                anywhere.add(phrase_id)
+                if phrase_id in bounded:
+                    continue
+                start = end - lengths[phrase_id] + 1
+                before = _is_word_char(text[start - 1]) if start > 0 else False
+                after = _is_word_char(text[end + 1]) if end < last else False
+                if before != self._starts_with_word[phrase_id] and after != self._ends_with_word[phrase_id]:
+                    bounded.add(phrase_id)
+        return anywhere, bounded
+
+def _weights(phrases, substring_for_multiword: bool):
+    """
+    (phrase, weight, substring) per distinct phrase. Duplicates in a list keep
+    counting once per entry, and multi-word positive phrases match as plain
+    substrings while everything else needs word boundaries.
+    """
+    weights = {}
+    for phrase in phrases:
+        substring = substring_for_multiword and len(phrase.split()) > 1
+        key = (phrase, substring)
+        weights[key] = weights.get(key, 0) + 1
+    return [(phrase, weight, substring) for (phrase, substring), weight in weights.items()]
+
+_MATCHER = PhraseMatcher(
+    STRONG_POSITIVE + MODERATE_POSITIVE + STRONG_NEGATIVE + MODERATE_NEGATIVE
+    + INDIVIDUAL_POSITIVE_WORDS + POSSESSIVE_WORDS + POSITIVE_PATTERN_TRIGGERS + NEGATION_TRIGGERS
+)
+
+def _compile_weights(phrases, substring_for_multiword: bool):
+    return [(_MATCHER.index[phrase], weight, substring)
+            for phrase, weight, substring in _weights(phrases, substring_for_multiword)]
+
+_STRONG_POSITIVE = _compile_weights(STRONG_POSITIVE, True)
+_MODERATE_POSITIVE = _compile_weights(MODERATE_POSITIVE, True)
+_STRONG_NEGATIVE = _compile_weights(STRONG_NEGATIVE, False)
+_MODERATE_NEGATIVE = _compile_weights(MODERATE_NEGATIVE, False)
+_INDIVIDUAL_POSITIVE_WORDS = [_MATCHER.index[word] for word in INDIVIDUAL_POSITIVE_WORDS]
+_POSSESSIVE_WORDS = [_MATCHER.index[word] for word in POSSESSIVE_WORDS]
+_POSITIVE_PATTERN_TRIGGERS = [_MATCHER.index[word] for word in POSITIVE_PATTERN_TRIGGERS]
+_NEGATION_TRIGGERS = [_MATCHER.index[word] for word in NEGATION_TRIGGERS]
+
+_POSITIVE_PATTERNS = [re.compile(pattern) for pattern in POSITIVE_PATTERNS]
+
+def _negation_effect(pattern: str):
+    # Negasi kata positif menambah skor negatif; negasi kata negatif menambah skor positif
+    if 'bagus' in pattern or 'baik' in pattern or 'puas' in pattern:
+        return 2, 0
+    elif 'jelek' in pattern or 'buruk' in pattern or 'kecewa' in pattern:
+        return 0, 2
+    return 0, 0
+
+_NEGATION_PATTERNS = [(re.compile(pattern), *_negation_effect(pattern)) for pattern in NEGATION_PATTERNS]
+
+def _count(entries, anywhere: set, bounded: set) -> int:
+    return sum(weight for phrase_id, weight, substring in entries
+               if phrase_id in (anywhere if substring else bounded))
+
+def count_indicators(text_lower: str) -> LexiconCounts:
+    """All lexicon counts for an already lower-cased review, from one automaton pass"""
+    anywhere, bounded = _MATCHER.find(text_lower)
+
+    pattern_pos = 0
+    if any(word in anywhere for word in _POSITIVE_PATTERN_TRIGGERS):
+        pattern_pos = sum(1 for pattern in _POSITIVE_PATTERNS if pattern.search(text_lower))
+
+    negation_negative = 0
+    negation_positive = 0
+    if any(word in anywhere for word in _NEGATION_TRIGGERS):
+        for pattern, negative, positive in _NEGATION_PATTERNS:
+            if pattern.search(text_lower):
+                negation_negative += negative
+                negation_positive += positive
+
+    return LexiconCounts(
+        strong_pos=_count(_STRONG_POSITIVE, anywhere, bounded),
+        moderate_pos=_count(_MODERATE_POSITIVE, anywhere, bounded),
+        strong_neg=_count(_STRONG_NEGATIVE, anywhere, bounded),
+        moderate_neg=_count(_MODERATE_NEGATIVE, anywhere, bounded),
+        pattern_pos=pattern_pos,
+        positive_words=sum(1 for word in _INDIVIDUAL_POSITIVE_WORDS if word in bounded),
+        has_possessive=any(word in bounded for word in _POSSESSIVE_WORDS),
+        negation_negative=negation_negative,
+        negation_positive=negation_positive,
+    )
@@ -1,12 +1,28 @@
 """
 Alternative server starter that handles errors gracefully
+
+With --workers N (N > 1) the server runs in prefork mode: the sentiment
+model is loaded once in this parent process, then N uvicorn workers are
+forked and serve the same listening socket. The model weights are shared
+copy-on-write instead of being loaded N times.
 """
+import argparse
+import gc
+import signal
 import sys
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Jumlah proses worker uvicorn (1 = satu proses seperti biasa)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# Thread inferensi per worker; 0 = jumlah core dibagi jumlah worker
+SERVER_WORKER_THREADS = int(os.getenv("SERVER_WORKER_THREADS", "0"))
+# Worker yang mati lebih cepat dari ini dianggap gagal startup dan tidak dijalankan ulang
+WORKER_MIN_UPTIME = 10.0
+
 def check_dependencies():
     """Check if all required dependencies are available"""
     # Periksa versi NumPy terlebih dahulu
@@ -68,7 +84,129 @@ def check_database():
         print("  CREATE DATABASE review_analyzer;")
         return False
 
+def worker_thread_budget(workers: int) -> int:
+    """Inference threads per worker so that all workers together use every core once"""
+    if SERVER_WORKER_THREADS > 0:
+        return SERVER_WORKER_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def preload_model(threads: int):
+    """Load the sentiment model in the parent so forked workers share its weights"""
+    import sentiment_analyzer
+    if sentiment_analyzer.SENTIMENT_SERVER_SOCKET:
+        print("⚠ SENTIMENT_SERVER_SOCKET is set, workers use the inference server instead")
+        return
+    if sentiment_analyzer.SENTIMENT_BACKEND != "torch":
+        # Thread pool ONNX Runtime dibuat saat sesi dibuat dan tidak ikut ter-fork
+        print(f"⚠ {sentiment_analyzer.SENTIMENT_BACKEND} backend is loaded per worker, not shared")
+        return
+    start = time.perf_counter()
+    # Hanya memuat bobot, tanpa inferensi: thread pool torch baru dibuat di tiap worker
+    sentiment_analyzer.set_inference_threads(threads)
+    sentiment_analyzer.get_sentiment_analyzer()
+    print(f"✓ Sentiment model loaded in parent in {time.perf_counter() - start:.1f}s")
+
+def bind_socket(host: str, port: int):
+    import socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock, index: int, threads: int):
+    """Body of one forked worker process; never returns"""
+    import uvicorn
+    import jobs
+    import sentiment_analyzer
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGUSR1):
+        signal.signal(sig, signal.SIG_DFL)
+    sentiment_analyzer.set_inference_threads(threads)
+    # Job tertunda cukup diambil ulang oleh satu worker
+    jobs.JOB_REQUEUE_ON_STARTUP = jobs.JOB_REQUEUE_ON_STARTUP and index == 0
+    exit_code = 0
+    try:
+        config = uvicorn.Config(app, log_level="info")
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        print(f"✗ Worker {index} failed: {e}")
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(exit_code)
+
+def run_prefork(app, host: str, port: int, workers: int):
+    """Load the model once, fork `workers` uvicorn workers and supervise them"""
+    from database import engine
+    from process_memory import format_memory_report
+
+    threads = worker_thread_budget(workers)
+    preload_model(threads)
+    # Koneksi database milik proses induk tidak boleh dipakai bersama oleh worker
+    engine.dispose()
+    sock = bind_socket(host, port)
+    # Objek yang sudah ada dipindah ke generasi permanen: GC di worker tidak menulis ke
+    # halaman memorinya, sehingga halaman tersebut tetap dibagi (copy-on-write)
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, sock, index, threads)
+        children[pid] = (index, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def memory_report(signum, frame):
+        pids = {"parent": os.getpid()}
+        pids.update({f"worker-{index}": pid for pid, (index, _) in sorted(children.items(), key=lambda c: c[1][0])})
+        print(format_memory_report(pids), flush=True)
+
+    for index in range(workers):
+        spawn(index)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGUSR1, memory_report)
+    print(f"✓ {workers} workers started (pid {os.getpid()}, {threads} inference thread(s) per worker)")
+    print(f"  Memory report: kill -USR1 {os.getpid()}")
+
+    while children:
+        try:
+            pid, wait_status = os.wait()
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            break
+        index, started = children.pop(pid)
+        if stopping:
+            continue
+        print(f"⚠ Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(wait_status)}")
+        if time.monotonic() - started < WORKER_MIN_UPTIME:
+            print("✗ Worker failed during startup, stopping server")
+            stop(signal.SIGTERM, None)
+            continue
+        spawn(index)
+    sock.close()
+    print("\n\nServer stopped")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the Product Review Analyzer backend")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="Number of worker processes sharing one preloaded model (prefork mode when > 1)")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("Product Review Analyzer - Backend Server")
     print("=" * 50)
@@ -122,7 +260,10 @@ if __name__ == "__main__":
                 print("  python fix_port.py")
                 sys.exit(1)
         
-        uvicorn.run(app, host="0.0.0.0", port=port, reload=False)
+        if args.workers > 1:
+            run_prefork(app, "0.0.0.0", port, args.workers)
+        else:
+            uvicorn.run(app, host="0.0.0.0", port=port, reload=False)
     except KeyboardInterrupt:
         print("\n\nServer stopped by user")
     except Exception as e:
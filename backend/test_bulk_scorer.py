@@ -0,0 +1,92 @@
+"""
+Test that the vectorised bulk scorer gives exactly the same labels and
+margins as the scalar rule-based Indonesian sentiment analysis
+"""
+import os
+import random
+import time
+
+import bulk_scorer
+import sentiment_lexicon
+import sentiment_analyzer
+from sentiment_analyzer import _score_sentiment_indonesian
+
+FILLER_WORDS = [
+    'dan', 'tapi', 'juga', 'saya', 'pengiriman', 'cepat', 'lama', 'seller', 'harga',
+    'ukuran', 'warna', 'sekali', 'lagi', 'beli', 'the', 'product', 'is', 'very', '!', ',',
+]
+
+def load_reviews():
+    """Review corpus shipped for the language detector (Indonesian and English)"""
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_data")
+    reviews = []
+    for name in ("id.txt", "en.txt"):
+        with open(os.path.join(base, name), encoding="utf-8") as f:
+            reviews.extend(line.strip() for line in f if line.strip())
+    with open(os.path.join(base, "eval.tsv"), encoding="utf-8") as f:
+        reviews.extend(line.rstrip("\n").split("\t", 1)[-1] for line in f if line.strip())
+    return reviews
+
+def generate_reviews(count: int, seed: int = 42):
+    """Random mixes of lexicon phrases, negations and filler words around the 15-word threshold"""
+    rng = random.Random(seed)
+    phrases = (
+        sentiment_lexicon.STRONG_POSITIVE + sentiment_lexicon.MODERATE_POSITIVE
+        + sentiment_lexicon.STRONG_NEGATIVE + sentiment_lexicon.MODERATE_NEGATIVE
+        + sentiment_lexicon.POSSESSIVE_WORDS + sentiment_lexicon.NEGATION_TRIGGERS
+    )
+    reviews = []
+    for _ in range(count):
+        parts = rng.sample(phrases, rng.randint(0, 4))
+        parts += rng.choices(FILLER_WORDS, k=rng.randint(0, 20))
+        rng.shuffle(parts)
+        review = " ".join(parts)
+        if rng.random() < 0.3:
+            review = review.upper()
+        reviews.append(review)
+    return reviews
+
+def test_bulk_scorer():
+    reviews = load_reviews() + generate_reviews(5000) + ["", "!!!", "bagus"]
+    print(f"Scoring {len(reviews)} reviews...")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    expected = [_score_sentiment_indonesian(review) for review in reviews]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels, margins = bulk_scorer.score_sentiment_indonesian_bulk(reviews)
+    bulk_time = time.perf_counter() - start
+
+    mismatches = [
+        (review, expected_label, expected_margin, label, int(margin))
+        for review, (expected_label, expected_margin), label, margin in zip(reviews, expected, labels, margins)
+        if (expected_label, expected_margin) != (label, int(margin))
+    ]
+    for review, expected_label, expected_margin, label, margin in mismatches[:10]:
+        print(f"✗ {review!r}: scalar ({expected_label}, {expected_margin}) != bulk ({label}, {margin})")
+
+    print(f"Scalar: {scalar_time * 1000:.1f} ms, bulk: {bulk_time * 1000:.1f} ms "
+          f"({'scipy.sparse' if bulk_scorer.sparse is not None else 'numpy'} features)")
+    assert not mismatches, f"{len(mismatches)} of {len(reviews)} reviews differ, first: {mismatches[0]}"
+    print(f"✓ All {len(reviews)} labels and margins match")
+
+def test_analyze_sentiment_batch():
+    """analyze_sentiment_batch (bulk lexicon pass) gives the same labels as analyze_sentiment per review"""
+    # Model ML diganti prediksi tetap agar tes tidak bergantung pada model yang terunduh
+    prediction = {"label": "LABEL_2", "score": 0.9}
+    original = sentiment_analyzer._predict, sentiment_analyzer._predict_texts
+    sentiment_analyzer._predict = lambda text: prediction
+    sentiment_analyzer._predict_texts = lambda texts, batch_size=None: [prediction] * len(texts)
+    try:
+        reviews = load_reviews() + generate_reviews(500)
+        expected = [sentiment_analyzer.analyze_sentiment(review) for review in reviews]
+        assert sentiment_analyzer.analyze_sentiment_batch(reviews) == expected
+    finally:
+        sentiment_analyzer._predict, sentiment_analyzer._predict_texts = original
+    print(f"✓ analyze_sentiment_batch matches analyze_sentiment on {len(reviews)} reviews")
+
+if __name__ == "__main__":
+    test_bulk_scorer()
+    test_analyze_sentiment_batch()
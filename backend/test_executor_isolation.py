@@ -0,0 +1,64 @@
+"""
+Test that GET /api/reviews stays fast while every analysis thread is busy
+with a slow key-point extraction (database work has its own executor)
+"""
+import os
+
+# Pool analisis kecil agar mudah dipenuhi; hanya berlaku jika executor belum diimpor tes lain
+os.environ.setdefault("ANALYSIS_WORKERS", "4")
+os.environ.setdefault("SENTIMENT_PRELOAD", "false")
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import executor
+import main
+
+SLOW_SECONDS = 2.0
+# Lebih banyak analisis daripada thread di pool analisis, sebesar apa pun pool-nya
+IN_FLIGHT = executor.ANALYSIS_WORKERS + 8
+MAX_GET_SECONDS = 0.5
+
+def _slow_key_points(review_text, language=None):
+    time.sleep(SLOW_SECONDS)
+    # SOURCE_SIMPLE: hasil uji tidak masuk result cache
+    return "• poin uji", main.SOURCE_SIMPLE
+
+def test_get_reviews_while_analysis_saturated():
+    original = main.extract_key_points_with_source, main.analyze_sentiment
+    main.extract_key_points_with_source = _slow_key_points
+    main.analyze_sentiment = lambda review_text, language=None: "neutral"
+    created = []
+    try:
+        with TestClient(main.app) as client:
+            def post(index):
+                response = client.post("/api/analyze-review", json={"review_text": f"uji saturasi executor {index}"})
+                if response.status_code == 201:
+                    created.append(response.json()["id"])
+
+            posts = [threading.Thread(target=post, args=(i,)) for i in range(IN_FLIGHT)]
+            for thread in posts:
+                thread.start()
+            time.sleep(0.5)
+            queued = executor.get_executor(executor.POOL_ANALYSIS)._work_queue.qsize()
+            assert queued > 0, "analysis executor is not saturated"
+
+            start = time.perf_counter()
+            response = client.get("/api/reviews?limit=5")
+            elapsed = time.perf_counter() - start
+            print(f"GET /api/reviews: {elapsed * 1000:.0f} ms with {queued} analysis call(s) queued")
+            assert response.status_code == 200
+            assert elapsed < MAX_GET_SECONDS, f"GET took {elapsed:.2f}s while analyses were in flight"
+
+            for thread in posts:
+                thread.join()
+            for review_id in created:
+                client.delete(f"/api/reviews/{review_id}")
+    finally:
+        main.extract_key_points_with_source, main.analyze_sentiment = original
+    print("✓ GET stays responsive while the analysis executor is saturated")
+
+if __name__ == "__main__":
+    test_get_reviews_while_analysis_saturated()
@@ -0,0 +1,104 @@
+"""
+Tests for the background job worker: no database connection is held while a
+job runs the model and the LLM, and a key-point result that only came from the
+simple fallback (all providers failed) is retried until the last attempt.
+"""
+import os
+
+os.environ.setdefault("SENTIMENT_PRELOAD", "false")
+
+from database import Base, SessionLocal, engine, sync_pool_metrics, upgrade_schema
+from models import AnalysisJob
+import jobs
+
+Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+def _checked_out() -> int:
+    return sync_pool_metrics.snapshot()["checked_out"]
+
+def _create_job(text: str) -> int:
+    with SessionLocal() as db:
+        return jobs.create_job(db, text).id
+
+def _delete_job(job_id: int):
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        if job is not None:
+            review = job.review
+            db.delete(job)
+            db.delete(review)
+            db.commit()
+
+def _patched(**replacements):
+    """Swap module attributes of jobs; returns the originals for restoring"""
+    original = {name: getattr(jobs, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(jobs, name, value)
+    return original
+
+def _run(job_id: int):
+    # Jalankan job langsung (tanpa thread worker); antrean lokal dikosongkan dulu
+    while not jobs._queue.empty():
+        jobs._queue.get_nowait()
+    jobs._process_job(job_id)
+
+def test_no_connection_held_during_analysis():
+    seen = []
+    def sentiment(review_text, language=None):
+        seen.append(_checked_out())
+        return "positive"
+    def key_points(review_text, language=None):
+        seen.append(_checked_out())
+        return "• poin uji", jobs.SOURCE_SIMPLE
+    original = _patched(analyze_sentiment=sentiment, extract_key_points_with_source=key_points,
+                        llm_configured=lambda: False)
+    job_id = _create_job("uji job tanpa koneksi tertahan")
+    try:
+        _run(job_id)
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
+            assert job.status == jobs.JOB_SUCCEEDED, job.status
+            assert job.review.sentiment == "positive"
+        assert seen == [0, 0], f"connections checked out during analysis: {seen}"
+    finally:
+        _patched(**original)
+        _delete_job(job_id)
+    print("✓ No connection is checked out while the job analyses")
+
+def test_provider_failure_is_retried():
+    job_id = _create_job("uji job saat semua provider gagal")
+    delays = []
+    original = _patched(
+        analyze_sentiment=lambda review_text, language=None: "negative",
+        extract_key_points_with_source=lambda review_text, language=None: ("• poin sederhana", jobs.SOURCE_SIMPLE),
+        llm_configured=lambda: True,
+        enqueue=lambda job_id, delay=0: delays.append(delay),
+    )
+    try:
+        for attempt in range(1, jobs.JOB_MAX_ATTEMPTS):
+            _run(job_id)
+            with SessionLocal() as db:
+                job = db.get(AnalysisJob, job_id)
+                assert job.status == jobs.JOB_QUEUED, f"attempt {attempt}: {job.status}"
+                assert job.attempts == attempt
+                assert job.error
+                assert job.review.key_points is None
+        assert delays == [jobs.JOB_RETRY_BACKOFF * 2 ** i for i in range(jobs.JOB_MAX_ATTEMPTS - 1)], delays
+
+        # Percobaan terakhir menerima poin sederhana sebagai hasil akhir
+        _run(job_id)
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
+            assert job.status == jobs.JOB_SUCCEEDED, job.status
+            assert job.error is None
+            assert job.review.key_points == "• poin sederhana"
+            assert job.review.sentiment == "negative"
+    finally:
+        _patched(**original)
+        _delete_job(job_id)
+    print(f"✓ Provider failure retried {jobs.JOB_MAX_ATTEMPTS - 1} time(s), simple key points kept on the last attempt")
+
+if __name__ == "__main__":
+    test_no_connection_held_during_analysis()
+    test_provider_failure_is_retried()
@@ -0,0 +1,37 @@
+"""
+Test language routing on language_data/eval.tsv, including the short
+reviews the n-gram model is unsure about (below LANGUAGE_MIN_CONFIDENCE)
+"""
+import language_detector
+from bench_language_detector import EVAL_PATH, read_eval
+from language_detector import LANGUAGE_DEFAULT, LANGUAGE_EN, LANGUAGE_MIN_CONFIDENCE
+
+# Deteksi tanpa memo agar setiap kasus benar-benar melewati model
+detect = language_detector.detect_language_with_confidence.__wrapped__
+
+def test_language_detector():
+    samples = read_eval(EVAL_PATH)
+    model = language_detector._model
+    assert model is not None, "language_model.bin is missing; run train_language_model.py"
+
+    uncertain = 0
+    wrong = []
+    for language, text in samples:
+        detected, _ = detect(text)
+        if model.classify(text.lower())[1] < LANGUAGE_MIN_CONFIDENCE:
+            uncertain += 1
+            # Teks ambigu memakai bahasa default, bukan detektor lama
+            assert detected == LANGUAGE_DEFAULT, f"{text!r}: {detected}"
+        if detected != language:
+            wrong.append((language, text))
+    assert uncertain >= 10, f"only {uncertain} eval review(s) exercise the low-confidence branch"
+
+    english_to_id = [text for language, text in wrong if language == LANGUAGE_EN]
+    if LANGUAGE_DEFAULT == LANGUAGE_EN:
+        assert not english_to_id, f"English reviews routed to id: {english_to_id}"
+    accuracy = 1 - len(wrong) / len(samples)
+    assert accuracy >= 0.95, f"accuracy {accuracy:.1%}, wrong: {wrong}"
+    print(f"✓ {len(samples)} eval reviews, {uncertain} below confidence {LANGUAGE_MIN_CONFIDENCE}, accuracy {accuracy:.1%}")
+
+if __name__ == "__main__":
+    test_language_detector()
@@ -0,0 +1,75 @@
+"""
+Test keyset pagination of GET /api/reviews: consecutive pages neither
+repeat nor skip reviews, also when many reviews share one created_at
+"""
+import os
+import uuid
+
+os.environ.setdefault("SENTIMENT_PRELOAD", "false")
+
+from fastapi.testclient import TestClient
+
+import bulk_ingest
+import main
+from database import SessionLocal, engine
+from models import Review
+
+REVIEWS = 5
+PAGE_SIZE = 2
+
+def _read_all_pages(client, marker: str):
+    seen = []
+    cursor = None
+    for _ in range(REVIEWS):
+        params = {"limit": PAGE_SIZE, "text_prefix": marker}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/reviews", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return seen
+
+def _check_pages(insert):
+    """Insert REVIEWS reviews with insert(marker) and read them back page by page"""
+    marker = f"uji-paginasi-{uuid.uuid4().hex}"
+    with TestClient(main.app) as client:
+        insert(marker)
+        with SessionLocal() as db:
+            expected = [review_id for review_id, in db.query(Review.id)
+                        .filter(Review.review_text.like(marker + "%")).order_by(Review.id.desc())]
+        try:
+            assert len(expected) == REVIEWS
+            seen = _read_all_pages(client, marker)
+            assert seen == expected, f"pages returned {seen}, expected {expected}"
+        finally:
+            with SessionLocal() as db:
+                for review in db.query(Review).filter(Review.id.in_(expected)):
+                    db.delete(review)
+                db.commit()
+
+def _insert_orm(marker: str):
+    # Satu transaksi: semua baris mendapat created_at (default server) yang sama
+    with SessionLocal() as db:
+        db.add_all([Review(review_text=f"{marker} ulasan {i}", sentiment="neutral") for i in range(REVIEWS)])
+        db.commit()
+
+def _insert_bulk(marker: str):
+    # bulk_ingest mengisi created_at sendiri (dengan mikrodetik), sama untuk semua baris
+    with engine.begin() as conn:
+        bulk_ingest.insert_reviews(conn, [f"{marker} ulasan {i}" for i in range(REVIEWS)], ["neutral"] * REVIEWS)
+
+def test_pages_with_server_default_created_at():
+    _check_pages(_insert_orm)
+    print(f"✓ {REVIEWS} reviews with a server-default created_at read in pages of {PAGE_SIZE} without repeats")
+
+def test_pages_with_explicit_created_at():
+    _check_pages(_insert_bulk)
+    print(f"✓ {REVIEWS} bulk-inserted reviews read in pages of {PAGE_SIZE} without repeats")
+
+if __name__ == "__main__":
+    test_pages_with_server_default_created_at()
+    test_pages_with_explicit_created_at()
@@ -0,0 +1,45 @@
+"""
+Test that /api/stats day buckets cover whole days: a start in the middle of
+a day is moved back to midnight, so the first bucket counts the full day
+"""
+import os
+from datetime import datetime
+
+os.environ.setdefault("SENTIMENT_PRELOAD", "false")
+
+import review_stats
+from database import Base, SessionLocal, engine, upgrade_schema
+from models import Review
+
+Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Tanggal lampau yang tidak dipakai data lain
+DAY = datetime(2001, 2, 3)
+
+def test_mid_day_start():
+    with SessionLocal() as db:
+        reviews = [
+            Review(review_text="uji statistik pagi", sentiment="positive", created_at=DAY.replace(hour=3)),
+            Review(review_text="uji statistik malam", sentiment="negative", created_at=DAY.replace(hour=20)),
+        ]
+        db.add_all(reviews)
+        db.commit()
+        try:
+            stats = review_stats.get_stats(db, "day", start=DAY.replace(hour=12, minute=30), end=DAY.replace(day=4))
+            assert stats["start"] == DAY, stats["start"]
+            assert [bucket["start"] for bucket in stats["buckets"]] == [DAY]
+            counts = stats["buckets"][0]["counts"]
+            assert counts == {"positive": 1, "negative": 1, "neutral": 0}, counts
+
+            stats = review_stats.get_stats(db, "hour", start=DAY.replace(hour=20, minute=45), end=DAY.replace(day=4))
+            assert stats["start"] == DAY.replace(hour=20), stats["start"]
+            assert [bucket["counts"]["negative"] for bucket in stats["buckets"]] == [1]
+        finally:
+            for review in reviews:
+                db.delete(review)
+            db.commit()
+    print("✓ A mid-day start is aligned to midnight and the whole day is counted")
+
+if __name__ == "__main__":
+    test_mid_day_start()
@@ -0,0 +1,54 @@
+"""
+Train the id/en language identifier used by language_detector.py.
+Reads one review per line from language_data/id.txt and language_data/en.txt
+and writes naive Bayes log-likelihood ratios per hashed feature bucket to
+language_model.bin. Run again after extending the corpus.
+"""
+import argparse
+import math
+import os
+from array import array
+
+from language_detector import (
+    LanguageModel, extract_features, feature_bucket, LANGUAGE_MODEL_PATH
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_data")
+
+def read_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def train(id_texts, en_texts, buckets: int = 16384, alpha: float = 0.5) -> LanguageModel:
+    """Multinomial naive Bayes with additive smoothing over hashed features"""
+    counts = {"id": [0] * buckets, "en": [0] * buckets}
+    totals = {"id": 0, "en": 0}
+    for language, texts in (("id", id_texts), ("en", en_texts)):
+        for text in texts:
+            for feature in extract_features(text.lower()):
+                counts[language][feature_bucket(feature, buckets)] += 1
+                totals[language] += 1
+
+    id_denominator = totals["id"] + alpha * buckets
+    en_denominator = totals["en"] + alpha * buckets
+    weights = array("f", (
+        math.log((counts["id"][b] + alpha) / id_denominator)
+        - math.log((counts["en"][b] + alpha) / en_denominator)
+        for b in range(buckets)
+    ))
+    bias = math.log(len(id_texts) / len(en_texts))
+    return LanguageModel(weights, bias)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the language identification model")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory containing id.txt and en.txt")
+    parser.add_argument("--output", default=LANGUAGE_MODEL_PATH, help="Model file to write")
+    parser.add_argument("--buckets", type=int, default=16384, help="Number of hashed feature buckets")
+    args = parser.parse_args()
+
+    id_texts = read_corpus(os.path.join(args.data_dir, "id.txt"))
+    en_texts = read_corpus(os.path.join(args.data_dir, "en.txt"))
+    model = train(id_texts, en_texts, buckets=args.buckets)
+    model.save(args.output)
+    print(f"✓ Trained on {len(id_texts)} Indonesian and {len(en_texts)} English reviews")
+    print(f"✓ Model saved to {args.output} ({os.path.getsize(args.output) // 1024} KB)")
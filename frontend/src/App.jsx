@@ -38,7 +38,7 @@ function App() {
         throw new Error(errorMessage)
       }
       const data = await response.json()
-      setReviews(data)
+      setReviews(data.items)
     } catch (err) {
       // Periksa apakah ini error jaringan
       if (err.message === "Failed to fetch" || err.name === "TypeError") {